@@ -1,53 +1,88 @@
 # Import necessary modules
-import copy
 import uuid
-from datetime import datetime
+from datetime import datetime, timezone
 
-from flask import abort
+from flask import abort, jsonify
 from flask.views import MethodView
 from flask_smorest import Blueprint
 from marshmallow import ValidationError
 
-# Import schema objects used for validation
+# Import the shared schema instances used for validation and serialisation
 from api.schemas import (
-    GetScheduledOrderSchema,
-    ScheduleOrderSchema,
-    GetKitchenScheduleParameters,
-    GetScheduledOrdersSchema,
-    ScheduleStatusSchema,
+    get_scheduled_order_schema,
+    schedule_order_schema,
+    get_kitchen_schedule_parameters,
+    get_scheduled_orders_schema,
+    schedule_status_schema,
+    SCHEDULE_STATUSES,
 )
+from api.serializers import dump_schedules
+from repository.sql_schedule_store import schedule_store_from_env
 
 # Create a new Flask Blueprint instance for the Kitchen API
 blueprint = Blueprint("kitchen", __name__, description="Kitchen API")
 
-# Initialize an empty list to hold schedules
-schedules = []
+# Initialize the store that holds the schedules: the database at DB_URL if
+# it's set, otherwise an in-memory store indexed by id, status and scheduled
+# time
+schedules = schedule_store_from_env()
 
 
 def validate_schedule(schedule):
     """
     Validates the input schedule data, checking that it adheres to the `GetScheduledOrderSchema`.
+    Schedules are validated once, before they're written to the store, so
+    reads can serve stored schedules as they are.
     Args:
         schedule (dict): A dictionary containing schedule details.
     Returns:
         None. If the schedule data fails validation, a `ValidationError` is raised.
     """
-    # Use deepcopy to ensure original schedule remains unmodified
-    schedule = copy.deepcopy(schedule)
-    # Convert scheduled time to ISO format before validating
-    schedule["scheduled"] = schedule["scheduled"].isoformat()
-    errors = GetScheduledOrderSchema().validate(schedule)
+    # Shallow copy with the scheduled time in ISO format, leaving the
+    # original schedule unmodified
+    schedule = {**schedule, "scheduled": schedule["scheduled"].isoformat()}
+    errors = get_scheduled_order_schema.validate(schedule)
     if errors:
         raise ValidationError(errors)
 
 
+def filter_statuses(parameters):
+    """
+    Translates the `progress` and `cancelled` query parameters into the set
+    of statuses to list, or None to list schedules in any status.
+    Args:
+        parameters (dict): Query parameters of the schedules listing.
+    Returns:
+        A set of statuses, or None.
+    """
+    statuses = set(SCHEDULE_STATUSES)
+    # Each parameter is named after the status it filters on
+    for status in ("progress", "cancelled"):
+        value = parameters.get(status)
+        if value is True:
+            statuses &= {status}
+        elif value is False:
+            statuses -= {status}
+    if statuses == set(SCHEDULE_STATUSES):
+        return None
+    return statuses
+
+
+def utc_naive(value):
+    # Scheduled times are stored as naive UTC datetimes, so timezone-aware
+    # query parameters are converted before comparing them
+    if value is not None and value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
 @blueprint.route("/kitchen/schedules")
 class KitchenSchedules(MethodView):
     """
     Flask class-based view for retrieving and creating kitchen schedules.
     """
-    @blueprint.arguments(GetKitchenScheduleParameters, location="query")
-    @blueprint.response(status_code=200, schema=GetScheduledOrdersSchema)
+    @blueprint.arguments(get_kitchen_schedule_parameters, location="query")
+    @blueprint.response(status_code=200, schema=get_scheduled_orders_schema)
     def get(self, parameters):
         """
         Retrieve a list of kitchen schedules based on query parameters.
@@ -57,43 +92,21 @@ class KitchenSchedules(MethodView):
         Returns:
             A dictionary containing a list of filtered schedules.
         """
-        for schedule in schedules:
-            validate_schedule(schedule)
-
-        if not parameters:
-            return {"schedules": schedules}
-
-        query_set = [schedule for schedule in schedules]
-
-        cancelled = parameters.get("cancelled")
-        if cancelled is not None:
-            if cancelled:
-                query_set = [
-                    schedule
-                    for schedule in schedules
-                    if schedule["status"] == "cancelled"
-                ]
-            else:
-                query_set = [
-                    schedule
-                    for schedule in schedules
-                    if schedule["status"] != "cancelled"
-                ]
-
-        since = parameters.get("since")
-        if since is not None:
-            query_set = [
-                schedule for schedule in schedules if schedule["scheduled"] >= since
-            ]
-
-        limit = parameters.get("limit")
-        if limit is not None and len(query_set) > limit:
-            query_set = query_set[:limit]
-
-        return {"schedules": query_set}
-
-    @blueprint.arguments(ScheduleOrderSchema)
-    @blueprint.response(status_code=201, schema=GetScheduledOrderSchema)
+        # Stored schedules were validated when they were written, and the
+        # store applies all the filters in one pass, stopping at `limit`
+        query_set = schedules.find(
+            statuses=filter_statuses(parameters),
+            since=utc_naive(parameters.get("since")),
+            limit=parameters.get("limit"),
+        )
+        # Serialise with the fast serialiser compiled from
+        # `GetScheduledOrdersSchema`. Returning a response skips the
+        # schema's dump in the response decorator, which is kept for the
+        # API documentation.
+        return jsonify(dump_schedules({"schedules": query_set}))
+
+    @blueprint.arguments(schedule_order_schema)
+    @blueprint.response(status_code=201, schema=get_scheduled_order_schema)
     def post(self, payload):
         """
         Create a new kitchen schedule.
@@ -109,9 +122,9 @@ class KitchenSchedules(MethodView):
         payload["scheduled"] = datetime.utcnow()
         # Set default status to 'pending'
         payload["status"] = "pending"
-        # Append the new schedule to the list of existing schedules
-        schedules.append(payload)
+        # Validate the new schedule before adding it to the store
         validate_schedule(payload)
+        schedules.add(payload)
         return payload
 
 
@@ -120,7 +133,7 @@ class KitchenSchedule(MethodView):
     """
     Flask class-based view for retrieving, updating, and deleting individual kitchen schedules.
     """
-    @blueprint.response(status_code=200, schema=GetScheduledOrderSchema)
+    @blueprint.response(status_code=200, schema=get_scheduled_order_schema)
     def get(self, schedule_id):
         """
         Retrieve details for a specific kitchen schedule.
@@ -130,14 +143,13 @@ class KitchenSchedule(MethodView):
         Returns:
             A dictionary containing the details of the specified schedule.
         """
-        for schedule in schedules:
-            if schedule["id"] == schedule_id:
-                validate_schedule(schedule)
-                return schedule
-        abort(404, description=f"Resource with ID {schedule_id} not found")
+        schedule = schedules.get(schedule_id)
+        if schedule is None:
+            abort(404, description=f"Resource with ID {schedule_id} not found")
+        return schedule
 
-    @blueprint.arguments(ScheduleOrderSchema)
-    @blueprint.response(status_code=200, schema=GetScheduledOrderSchema)
+    @blueprint.arguments(schedule_order_schema)
+    @blueprint.response(status_code=200, schema=get_scheduled_order_schema)
     def put(self, payload, schedule_id):
         """
         Update an existing kitchen schedule.
@@ -148,13 +160,16 @@ class KitchenSchedule(MethodView):
         Returns:
             A dictionary containing the updated schedule details.
         """
-        for schedule in schedules:
-            if schedule["id"] == schedule_id:
-                # Update the existing schedule with the new payload data
-                schedule.update(payload)
-                validate_schedule(schedule)
-                return schedule
-        abort(404, description=f"Resource with ID {schedule_id} not found")
+        schedule = schedules.get(schedule_id)
+        if schedule is None:
+            abort(404, description=f"Resource with ID {schedule_id} not found")
+        # Validate the updated schedule before writing it to the store
+        validate_schedule({**schedule, **payload})
+        schedule = schedules.update(schedule_id, **payload)
+        # The schedule may have been deleted by another request in between
+        if schedule is None:
+            abort(404, description=f"Resource with ID {schedule_id} not found")
+        return schedule
 
     @blueprint.response(status_code=204)
     def delete(self, schedule_id):
@@ -166,15 +181,12 @@ class KitchenSchedule(MethodView):
         Returns:
             None.
         """
-        for index, schedule in enumerate(schedules):
-            if schedule["id"] == schedule_id:
-                # Remove the schedule from the list of schedules
-                schedules.pop(index)
-                return
-        abort(404, description=f"Resource with ID {schedule_id} not found")
+        # Remove the schedule and its index entries from the store
+        if not schedules.delete(schedule_id):
+            abort(404, description=f"Resource with ID {schedule_id} not found")
 
 
-@blueprint.response(status_code=200, schema=GetScheduledOrderSchema)
+@blueprint.response(status_code=200, schema=get_scheduled_order_schema)
 @blueprint.route("/kitchen/schedules/<schedule_id>/cancel", methods=["POST"])
 def cancel_schedule(schedule_id):
     """
@@ -185,16 +197,19 @@ def cancel_schedule(schedule_id):
     Returns:
         A dictionary containing the cancelled schedule's details.
     """
-    for schedule in schedules:
-        if schedule["id"] == schedule_id:
-            # Set status of specified schedule to 'cancelled'
-            schedule["status"] = "cancelled"
-            validate_schedule(schedule)
-            return schedule
-    abort(404, description=f"Resource with ID {schedule_id} not found")
+    schedule = schedules.get(schedule_id)
+    if schedule is None:
+        abort(404, description=f"Resource with ID {schedule_id} not found")
+    # Validate the cancelled schedule before writing it to the store
+    validate_schedule({**schedule, "status": "cancelled"})
+    # Set status of specified schedule to 'cancelled'
+    schedule = schedules.update(schedule_id, status="cancelled")
+    if schedule is None:
+        abort(404, description=f"Resource with ID {schedule_id} not found")
+    return schedule
 
 
-@blueprint.response(status_code=200, schema=ScheduleStatusSchema)
+@blueprint.response(status_code=200, schema=schedule_status_schema)
 @blueprint.route("/kitchen/schedules/<schedule_id>/status", methods=["GET"])
 def get_schedule_status(schedule_id):
     """
@@ -205,8 +220,7 @@ def get_schedule_status(schedule_id):
     Returns:
         A dictionary containing the status of the specified schedule.
     """
-    for schedule in schedules:
-        if schedule["id"] == schedule_id:
-            validate_schedule(schedule)
-            return {"status": schedule["status"]}
-    abort(404, description=f"Resource with ID {schedule_id} not found") 
+    schedule = schedules.get(schedule_id)
+    if schedule is None:
+        abort(404, description=f"Resource with ID {schedule_id} not found")
+    return {"status": schedule["status"]}
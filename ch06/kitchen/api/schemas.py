@@ -1,6 +1,9 @@
 # Importing necessary libraries and modules
 from marshmallow import Schema, fields, validate, EXCLUDE
 
+# Statuses a kitchen schedule can be in
+SCHEDULE_STATUSES = ["pending", "progress", "cancelled", "finished"]
+
 # Defining OrderItemSchema class
 class OrderItemSchema(Schema):
     # Class Meta to exclude unknown fields
@@ -33,7 +36,7 @@ class GetScheduledOrderSchema(ScheduleOrderSchema):
     scheduled = fields.DateTime(required=True)
     status = fields.String(
         required=True,
-        validate=validate.OneOf(["pending", "progress", "cancelled", "finished"]),
+        validate=validate.OneOf(SCHEDULE_STATUSES),
     )
 
 # Defining GetScheduledOrdersSchema class
@@ -54,7 +57,7 @@ class ScheduleStatusSchema(Schema):
     # Defining fields for ScheduleStatusSchema
     status = fields.String(
         required=True,
-        validate=validate.OneOf(["pending", "progress", "cancelled", "finished"]),
+        validate=validate.OneOf(SCHEDULE_STATUSES),
     )
 
 # Defining GetKitchenScheduleParameters class
@@ -65,5 +68,16 @@ class GetKitchenScheduleParameters(Schema):
 
     # Defining fields for GetKitchenScheduleParameters
     progress = fields.Boolean()
-    limit = fields.Integer()
+    cancelled = fields.Boolean()
+    limit = fields.Integer(validate=validate.Range(min=0))
     since = fields.DateTime()
+
+# Shared schema instances. Building a schema binds its fields and resolves
+# nested schemas, so each one is built once, when this module is imported,
+# and reused by every request. Marshmallow doesn't keep per-call state on a
+# schema, so concurrent requests can use the same instance.
+schedule_order_schema = ScheduleOrderSchema()
+get_scheduled_order_schema = GetScheduledOrderSchema()
+get_scheduled_orders_schema = GetScheduledOrdersSchema()
+schedule_status_schema = ScheduleStatusSchema()
+get_kitchen_schedule_parameters = GetKitchenScheduleParameters()
@@ -0,0 +1,58 @@
+# Import necessary modules
+from marshmallow import fields
+
+# Import the shared schema instance the fast serialiser is compiled from
+from api.schemas import get_scheduled_orders_schema
+
+# Fields whose values are returned as they are: schedules are validated when
+# they're written, so these values already have the right type
+PASSTHROUGH_FIELDS = (fields.String, fields.Integer, fields.Boolean)
+
+
+def compile_field(field):
+    """
+    Returns a function that serialises a value of `field` like
+    `field.serialize()` does, with the type dispatch done once up front.
+    """
+    if isinstance(field, fields.Nested):
+        serialize = compile_schema(field.schema)
+        if field.many:
+            return lambda value: [serialize(item) for item in value]
+        return serialize
+    if isinstance(field, fields.List):
+        serialize_item = compile_field(field.inner)
+        return lambda value: [serialize_item(item) for item in value]
+    if isinstance(field, PASSTHROUGH_FIELDS):
+        return lambda value: value
+    if isinstance(field, fields.UUID):
+        return str
+    if isinstance(field, fields.DateTime) and field.format in (None, "iso"):
+        return lambda value: value.isoformat()
+    # Any other field falls back to marshmallow's own serialisation
+    return lambda value: field._serialize(value, None, None)
+
+
+def compile_schema(schema):
+    """
+    Compiles `schema` into a function that dumps a dictionary with the same
+    output as `schema.dump()`, skipping marshmallow's per-field lookups and
+    hooks. Only meant for data that was validated against the schema.
+    """
+    converters = [
+        (field.data_key or name, name, compile_field(field))
+        for name, field in schema.dump_fields.items()
+    ]
+
+    def serialize(obj):
+        result = {}
+        for key, attribute, convert in converters:
+            if attribute in obj:
+                value = obj[attribute]
+                result[key] = None if value is None else convert(value)
+        return result
+
+    return serialize
+
+
+# Fast serialiser for `GetScheduledOrdersSchema` payloads
+dump_schedules = compile_schema(get_scheduled_orders_schema)
@@ -8,6 +8,7 @@ from flask_smorest import Api
 # Import blueprint object and configuration object
 from api.api import blueprint
 from config import BaseConfig
+from openapi import PrecomputedSpec
 
 # Create new Flask application instance
 app = Flask(__name__)
@@ -37,3 +38,9 @@ spec.to_dict = lambda: api_spec
 # Assign the `spec` instance to the `spec` attribute of `kitchen_api`
 kitchen_api.spec = spec
 
+
+# Serve the OpenAPI document from JSON bytes rendered once, with gzip/brotli
+# encodings and ETag validation, instead of re-serialising it on every request
+app.view_functions["api-docs.openapi_json"] = PrecomputedSpec(api_spec).view(
+    app.response_class
+)
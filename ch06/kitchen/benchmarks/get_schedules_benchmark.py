@@ -0,0 +1,82 @@
+"""
+Measures GET /kitchen/schedules with a large number of stored schedules. Run
+it from the kitchen folder:
+
+    python benchmarks/get_schedules_benchmark.py [--schedules 10000 100000] \
+        [--requests 3] [--output results.json]
+
+"validate_all" times what every listing used to do before returning: one
+validate_schedule() call per stored schedule. "list" and "list_limit" time
+the endpoint itself, without and with ?limit=10.
+"""
+
+# Import necessary modules
+import argparse
+import json
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from api import api  # noqa: E402
+from app import app  # noqa: E402
+
+
+def fill_store(number_of_schedules):
+    # Replace the API's store with a new one holding the generated schedules
+    api.schedules = type(api.schedules)()
+    start = datetime.utcnow() - timedelta(seconds=number_of_schedules)
+    for index in range(number_of_schedules):
+        api.schedules.add(
+            {
+                "id": str(uuid.uuid4()),
+                "order": [{"product": "cappuccino", "size": "small", "quantity": 1}],
+                "scheduled": start + timedelta(seconds=index),
+                "status": "pending",
+            }
+        )
+
+
+def measure(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return {"median_seconds": statistics.median(timings), "runs": repeat}
+
+
+def get(client, url):
+    response = client.get(url)
+    assert response.status_code == 200, response.status_code
+
+
+def run(number_of_schedules, repeat):
+    fill_store(number_of_schedules)
+    client = app.test_client()
+    return {
+        "schedules": number_of_schedules,
+        "validate_all": measure(
+            lambda: [api.validate_schedule(s) for s in api.schedules.find()], repeat
+        ),
+        "list": measure(lambda: get(client, "/kitchen/schedules"), repeat),
+        "list_limit": measure(
+            lambda: get(client, "/kitchen/schedules?limit=10"), repeat
+        ),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--schedules", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--requests", type=int, default=3)
+    parser.add_argument("--output", type=Path)
+    args = parser.parse_args()
+    results = [run(number, args.requests) for number in args.schedules]
+    print(json.dumps(results, indent=2))
+    if args.output is not None:
+        args.output.write_text(json.dumps(results, indent=2))
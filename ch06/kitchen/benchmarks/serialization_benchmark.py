@@ -0,0 +1,100 @@
+"""
+Measures serialising a list of schedules like GET /kitchen/schedules does.
+Run it from the kitchen folder:
+
+    python benchmarks/serialization_benchmark.py [--schedules 10000] \
+        [--repeat 5] [--output results.json]
+
+"new_schema" builds a GetScheduledOrdersSchema for every dump, "cached_schema"
+reuses the shared instance, and "compiled" uses the fast serialiser compiled
+from it. "validate_new_schema" and "validate_cached_schema" time
+validate_schedule() with a new and with the shared GetScheduledOrderSchema.
+All the serialisers must produce the same output.
+"""
+
+# Import necessary modules
+import argparse
+import json
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from api.schemas import (  # noqa: E402
+    GetScheduledOrderSchema,
+    GetScheduledOrdersSchema,
+    get_scheduled_order_schema,
+    get_scheduled_orders_schema,
+)
+from api.serializers import dump_schedules  # noqa: E402
+
+
+def make_schedules(number_of_schedules):
+    start = datetime.utcnow() - timedelta(seconds=number_of_schedules)
+    return [
+        {
+            "id": str(uuid.uuid4()),
+            "order": [
+                {"product": "cappuccino", "size": "small", "quantity": 1},
+                {"product": "croissant", "size": "medium", "quantity": 2},
+            ],
+            "scheduled": start + timedelta(seconds=index),
+            "status": "pending",
+        }
+        for index in range(number_of_schedules)
+    ]
+
+
+def measure(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return {"median_seconds": statistics.median(timings), "runs": repeat}
+
+
+def validate_with(schema_factory, schedules):
+    for schedule in schedules:
+        schema_factory().validate(
+            {**schedule, "scheduled": schedule["scheduled"].isoformat()}
+        )
+
+
+def run(number_of_schedules, repeat):
+    payload = {"schedules": make_schedules(number_of_schedules)}
+    expected = GetScheduledOrdersSchema().dump(payload)
+    assert get_scheduled_orders_schema.dump(payload) == expected
+    assert dump_schedules(payload) == expected
+    schedules = payload["schedules"]
+    return {
+        "schedules": number_of_schedules,
+        "new_schema": measure(lambda: GetScheduledOrdersSchema().dump(payload), repeat),
+        "cached_schema": measure(
+            lambda: get_scheduled_orders_schema.dump(payload), repeat
+        ),
+        "compiled": measure(lambda: dump_schedules(payload), repeat),
+        "validate_new_schema": measure(
+            lambda: validate_with(GetScheduledOrderSchema, schedules), repeat
+        ),
+        "validate_cached_schema": measure(
+            lambda: validate_with(lambda: get_scheduled_order_schema, schedules),
+            repeat,
+        ),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--schedules", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", type=Path)
+    args = parser.parse_args()
+    results = run(args.schedules, args.repeat)
+    print(json.dumps(results, indent=2))
+    if args.output is not None:
+        args.output.write_text(json.dumps(results, indent=2))
@@ -0,0 +1,55 @@
+# Import necessary modules
+import gzip
+import hashlib
+import json
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+class PrecomputedSpec:
+    """Serves the OpenAPI document from bytes rendered once at startup."""
+
+    def __init__(self, document):
+        # Render the document once, keeping the key order of oas.yaml
+        body = json.dumps(document, indent=2).encode()
+        digest = hashlib.sha256(body).hexdigest()[:32]
+
+        # Keep one (body, etag) pair per content coding, most preferred first.
+        # Each coding gets its own strong ETag because the bytes differ.
+        self.representations = {}
+        if brotli is not None:
+            self.representations["br"] = (brotli.compress(body), f"{digest}-br")
+        self.representations["gzip"] = (
+            gzip.compress(body, compresslevel=9, mtime=0),
+            f"{digest}-gzip",
+        )
+        self.representations["identity"] = (body, digest)
+
+    def select(self):
+        # Pick the first coding the client accepts, falling back to identity
+        for encoding in self.representations:
+            if request.accept_encodings.quality(encoding) > 0:
+                return encoding
+        return "identity"
+
+    def view(self, response_class):
+        """Returns a Flask view function serving the precomputed document."""
+
+        def openapi_json():
+            encoding = self.select()
+            body, etag = self.representations[encoding]
+            response = response_class(body, mimetype="application/json")
+            response.set_etag(etag)
+            response.vary.add("Accept-Encoding")
+            response.cache_control.no_cache = True
+            if encoding != "identity":
+                response.headers["Content-Encoding"] = encoding
+            # Answer with 304 Not Modified when If-None-Match matches the ETag
+            return response.make_conditional(request)
+
+        return openapi_json
@@ -0,0 +1,38 @@
+# Import necessary modules
+import uuid
+from datetime import datetime
+
+from sqlalchemy import JSON, Column, DateTime, Index, String
+from sqlalchemy.ext.declarative import declarative_base
+
+Base = declarative_base()
+
+
+def generate_uuid():
+    return str(uuid.uuid4())
+
+
+class ScheduleModel(Base):
+    __tablename__ = "schedule"
+
+    id = Column(String, primary_key=True, default=generate_uuid)
+    # The order items are always read and written together with the schedule,
+    # so they're stored in the same row instead of a separate table
+    order = Column(JSON, nullable=False)
+    scheduled = Column(DateTime, nullable=False, default=datetime.utcnow)
+    status = Column(String, nullable=False, default="pending")
+
+    __table_args__ = (
+        # Serves the listing sorted by scheduled time and the since filter
+        Index("ix_schedule_scheduled_id", "scheduled", "id"),
+        # Serves the status filters, combined with since and the sort order
+        Index("ix_schedule_status_scheduled_id", "status", "scheduled", "id"),
+    )
+
+    def dict(self):
+        return {
+            "id": self.id,
+            "order": self.order,
+            "scheduled": self.scheduled,
+            "status": self.status,
+        }
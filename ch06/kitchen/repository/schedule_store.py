@@ -0,0 +1,117 @@
+# Import necessary modules
+import bisect
+import heapq
+import itertools
+import threading
+
+
+class ScheduleStore:
+    """
+    In-memory store of kitchen schedules, indexed by id, by status and by
+    scheduled time.
+
+    Schedules are dictionaries with at least the `id`, `status` and
+    `scheduled` keys. The store is safe to use from several threads. Stored
+    schedules are never changed in place: `add` keeps a copy of the new
+    schedule and `update` replaces it with an updated copy. The schedules
+    returned by the store therefore stay as they were when they were read,
+    even while other requests change the store, and callers must not modify
+    them.
+
+    The public methods are the interface the API relies on, so the store can
+    be replaced by a SQL-backed one with the same methods.
+    """
+
+    def __init__(self):
+        # Guards the schedules and the indexes, which must change together
+        self._lock = threading.RLock()
+        # Primary index: id -> schedule, in insertion order
+        self._schedules = {}
+        # Secondary indexes: sorted lists of (scheduled, id) pairs, one for
+        # all the schedules and one per status, so that time range queries
+        # can bisect instead of scanning every schedule
+        self._by_scheduled = []
+        self._by_status = {}
+
+    def __len__(self):
+        return len(self._schedules)
+
+    def _index(self, schedule):
+        key = (schedule["scheduled"], schedule["id"])
+        bisect.insort(self._by_scheduled, key)
+        bisect.insort(self._by_status.setdefault(schedule["status"], []), key)
+
+    def _unindex(self, schedule):
+        key = (schedule["scheduled"], schedule["id"])
+        for index in (self._by_scheduled, self._by_status[schedule["status"]]):
+            del index[bisect.bisect_left(index, key)]
+        if not self._by_status[schedule["status"]]:
+            del self._by_status[schedule["status"]]
+
+    def add(self, schedule):
+        """Stores a copy of a new schedule and returns it."""
+        schedule = dict(schedule)
+        with self._lock:
+            if schedule["id"] in self._schedules:
+                raise KeyError(f"Schedule with ID {schedule['id']} already exists")
+            self._schedules[schedule["id"]] = schedule
+            self._index(schedule)
+        return schedule
+
+    def get(self, schedule_id):
+        """Returns the schedule with `schedule_id`, or None if there isn't one."""
+        return self._schedules.get(schedule_id)
+
+    def update(self, schedule_id, **changes):
+        """
+        Replaces the schedule with `schedule_id` with a copy that has
+        `changes` applied and returns it, or returns None if there isn't one.
+        The indexes are updated if the status or the scheduled time change.
+        """
+        with self._lock:
+            previous = self._schedules.get(schedule_id)
+            if previous is None:
+                return None
+            self._unindex(previous)
+            schedule = {**previous, **changes}
+            self._schedules[schedule_id] = schedule
+            self._index(schedule)
+        return schedule
+
+    def delete(self, schedule_id):
+        """Deletes the schedule with `schedule_id` and returns whether it existed."""
+        with self._lock:
+            schedule = self._schedules.pop(schedule_id, None)
+            if schedule is None:
+                return False
+            self._unindex(schedule)
+        return True
+
+    def find(self, statuses=None, since=None, limit=None):
+        """
+        Returns up to `limit` schedules with any of `statuses` that are
+        scheduled at or after `since`, sorted by scheduled time. Any filter
+        can be None, so `find()` returns all the schedules.
+
+        The filters are applied in a single lazy pass: each status index is
+        read from the first entry at or after `since`, the indexes are merged
+        on the fly, and reading stops as soon as `limit` schedules are found.
+        """
+        with self._lock:
+            if statuses is None:
+                indexes = [self._by_scheduled]
+            else:
+                indexes = [self._by_status.get(status, []) for status in statuses]
+            merged = heapq.merge(*(self._scan(index, since) for index in indexes))
+            return [
+                self._schedules[schedule_id]
+                for _, schedule_id in itertools.islice(merged, limit)
+            ]
+
+    @staticmethod
+    def _scan(index, since):
+        # Yields the entries of a sorted index from `since` onwards, without
+        # copying the index
+        start = 0 if since is None else bisect.bisect_left(index, (since,))
+        for position in range(start, len(index)):
+            yield index[position]
@@ -0,0 +1,59 @@
+# Import necessary modules
+from sqlalchemy import delete, func, select
+
+from repository.models import ScheduleModel
+
+
+class SchedulesRepository:
+    """
+    Reads and writes kitchen schedules through a SQLAlchemy session. Schedules
+    are returned as dictionaries, like the ones kept by `ScheduleStore`.
+    """
+
+    def __init__(self, session):
+        self.session = session
+
+    def __len__(self):
+        return self.session.execute(select(func.count(ScheduleModel.id))).scalar()
+
+    def add(self, schedule):
+        record = ScheduleModel(**schedule)
+        self.session.add(record)
+        self.session.flush()
+        return record.dict()
+
+    def _get(self, schedule_id):
+        return self.session.get(ScheduleModel, str(schedule_id))
+
+    def get(self, schedule_id):
+        record = self._get(schedule_id)
+        if record is not None:
+            return record.dict()
+
+    def update(self, schedule_id, **changes):
+        record = self._get(schedule_id)
+        if record is None:
+            return None
+        for key, value in changes.items():
+            setattr(record, key, value)
+        self.session.flush()
+        return record.dict()
+
+    def delete(self, schedule_id):
+        result = self.session.execute(
+            delete(ScheduleModel).where(ScheduleModel.id == str(schedule_id))
+        )
+        return result.rowcount > 0
+
+    def find(self, statuses=None, since=None, limit=None):
+        """
+        Same filters as `ScheduleStore.find()`, applied by the database with
+        the status and scheduled time indexes.
+        """
+        query = select(ScheduleModel)
+        if statuses is not None:
+            query = query.where(ScheduleModel.status.in_(statuses))
+        if since is not None:
+            query = query.where(ScheduleModel.scheduled >= since)
+        query = query.order_by(ScheduleModel.scheduled, ScheduleModel.id).limit(limit)
+        return [record.dict() for record in self.session.execute(query).scalars()]
@@ -0,0 +1,48 @@
+# Import necessary modules
+from repository.schedule_store import ScheduleStore
+from repository.schedules_repository import SchedulesRepository
+from repository.unit_of_work import DB_URL, UnitOfWork
+
+
+class SqlScheduleStore:
+    """
+    `ScheduleStore` interface backed by the database. Every call runs in its
+    own unit of work, so several replicas of the kitchen API can share the
+    schedules.
+    """
+
+    def _run(self, method, *args, commit=False, **kwargs):
+        with UnitOfWork() as unit_of_work:
+            repository = SchedulesRepository(unit_of_work.session)
+            result = getattr(repository, method)(*args, **kwargs)
+            if commit:
+                unit_of_work.commit()
+            return result
+
+    def __len__(self):
+        return self._run("__len__")
+
+    def add(self, schedule):
+        return self._run("add", schedule, commit=True)
+
+    def get(self, schedule_id):
+        return self._run("get", schedule_id)
+
+    def update(self, schedule_id, **changes):
+        return self._run("update", schedule_id, commit=True, **changes)
+
+    def delete(self, schedule_id):
+        return self._run("delete", schedule_id, commit=True)
+
+    def find(self, statuses=None, since=None, limit=None):
+        return self._run("find", statuses=statuses, since=since, limit=limit)
+
+
+def schedule_store_from_env():
+    """
+    Returns a `SqlScheduleStore` if DB_URL is set, or an in-memory
+    `ScheduleStore` otherwise.
+    """
+    if DB_URL is not None:
+        return SqlScheduleStore()
+    return ScheduleStore()
@@ -0,0 +1,46 @@
+# Import necessary modules
+import os
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+# Schedules are kept in the database at DB_URL. Without it, the API keeps them
+# in an in-memory ScheduleStore, which only suits a single process.
+DB_URL = os.getenv("DB_URL")
+
+engine = None
+session_maker = None
+
+
+def init_engine():
+    """
+    Creates the process-wide engine and session factory on first use;
+    calling it again is a no-op.
+    """
+    global engine, session_maker
+    assert DB_URL is not None, "DB_URL environment variable needed."
+    if engine is None:
+        engine = create_engine(DB_URL, pool_pre_ping=True)
+        session_maker = sessionmaker(bind=engine)
+    return engine
+
+
+class UnitOfWork:
+    def __init__(self):
+        init_engine()
+        self.session_maker = session_maker
+
+    def __enter__(self):
+        self.session = self.session_maker()
+        return self
+
+    def __exit__(self, exc_type, exc_val, traceback):
+        if exc_type is not None:
+            self.rollback()
+        self.session.close()
+
+    def commit(self):
+        self.session.commit()
+
+    def rollback(self):
+        self.session.rollback()
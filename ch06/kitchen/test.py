@@ -0,0 +1,365 @@
+import random
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+
+from api.schemas import SCHEDULE_STATUSES, get_scheduled_orders_schema
+from api.serializers import dump_schedules
+from repository.schedule_store import ScheduleStore
+from repository.sql_schedule_store import SqlScheduleStore
+
+START = datetime(2026, 1, 1)
+ORDER = {"order": [{"product": "latte", "size": "big", "quantity": 2}]}
+
+
+def new_schedule(status="pending", minutes=0):
+    return {
+        "id": str(uuid.uuid4()),
+        "order": [{"product": "cappuccino", "size": "small", "quantity": 1}],
+        "scheduled": START + timedelta(minutes=minutes),
+        "status": status,
+    }
+
+
+def sorted_ids(schedules):
+    return [
+        schedule["id"]
+        for schedule in sorted(schedules, key=lambda s: (s["scheduled"], s["id"]))
+    ]
+
+
+def assert_indexes_match_schedules(store):
+    schedules = list(store._schedules.values())
+    keys = sorted((schedule["scheduled"], schedule["id"]) for schedule in schedules)
+    assert store._by_scheduled == keys
+    assert store._by_status == {
+        status: [key for key in keys if store._schedules[key[1]]["status"] == status]
+        for status in {schedule["status"] for schedule in schedules}
+    }
+
+
+@pytest.fixture
+def store():
+    return ScheduleStore()
+
+
+def test_store_indexes_follow_updates_and_deletes(store):
+    first, second, third = (
+        store.add(new_schedule(minutes=minutes)) for minutes in (0, 10, 20)
+    )
+    store.update(first["id"], status="cancelled")
+    store.update(third["id"], scheduled=START - timedelta(minutes=10))
+    assert_indexes_match_schedules(store)
+    assert sorted_ids(store.find()) == [third["id"], first["id"], second["id"]]
+    assert store.find(statuses=["cancelled"]) == [store.get(first["id"])]
+    assert store.find(statuses=["pending"], since=START) == [second]
+
+    assert store.delete(first["id"])
+    assert not store.delete(first["id"])
+    assert store.get(first["id"]) is None
+    assert store.update(first["id"], status="pending") is None
+    assert_indexes_match_schedules(store)
+    assert "cancelled" not in store._by_status
+    assert store.find(statuses=["cancelled"]) == []
+    assert sorted_ids(store.find()) == [third["id"], second["id"]]
+    assert len(store) == 2
+
+
+def test_store_matches_a_plain_dictionary_of_schedules(store):
+    randomizer = random.Random(0)
+    expected = {}
+    for _ in range(2000):
+        operation = randomizer.random()
+        if operation < 0.4 or not expected:
+            schedule = new_schedule(
+                randomizer.choice(SCHEDULE_STATUSES), randomizer.randint(0, 100)
+            )
+            store.add(schedule)
+            expected[schedule["id"]] = schedule
+        elif operation < 0.7:
+            schedule_id = randomizer.choice(list(expected))
+            changes = {"status": randomizer.choice(SCHEDULE_STATUSES)}
+            if randomizer.random() < 0.5:
+                changes["scheduled"] = START + timedelta(
+                    minutes=randomizer.randint(0, 100)
+                )
+            expected[schedule_id] = {**expected[schedule_id], **changes}
+            assert store.update(schedule_id, **changes) == expected[schedule_id]
+        elif operation < 0.8:
+            schedule_id = randomizer.choice(list(expected))
+            assert store.delete(schedule_id)
+            del expected[schedule_id]
+        else:
+            statuses = randomizer.choice(
+                [
+                    None,
+                    [randomizer.choice(SCHEDULE_STATUSES)],
+                    randomizer.sample(SCHEDULE_STATUSES, 2),
+                ]
+            )
+            since = randomizer.choice(
+                [None, START + timedelta(minutes=randomizer.randint(0, 100))]
+            )
+            assert sorted_ids(store.find(statuses=statuses, since=since)) == [
+                schedule["id"]
+                for schedule in map(expected.get, sorted_ids(expected.values()))
+                if (statuses is None or schedule["status"] in statuses)
+                and (since is None or schedule["scheduled"] >= since)
+            ]
+    assert len(store) == len(expected)
+    assert_indexes_match_schedules(store)
+
+
+def test_store_hands_out_schedules_that_later_changes_leave_alone(store):
+    schedule = new_schedule()
+    added = store.add(schedule)
+    # The store keeps its own copy of the new schedule
+    schedule["status"] = "finished"
+    assert store.get(added["id"])["status"] == "pending"
+
+    read = store.get(added["id"])
+    listed = store.find(statuses=["pending"])
+    updated = store.update(added["id"], status="cancelled")
+    assert read["status"] == listed[0]["status"] == "pending"
+    assert updated["status"] == store.get(added["id"])["status"] == "cancelled"
+    assert_indexes_match_schedules(store)
+
+
+@pytest.fixture
+def client(store, monkeypatch):
+    from api import api
+    from app import app
+
+    monkeypatch.setattr(api, "schedules", store)
+    return app.test_client()
+
+
+def listed_ids(client, **parameters):
+    response = client.get("/kitchen/schedules", query_string=parameters)
+    assert response.status_code == 200
+    return [schedule["id"] for schedule in response.get_json()["schedules"]]
+
+
+@pytest.fixture
+def schedules(store, client):
+    """
+    Eight schedules, one every ten minutes from START. The first and the
+    fifth are cancelled, and the second and the sixth are in progress.
+    """
+    ids = [
+        store.add(new_schedule(minutes=10 * position))["id"] for position in range(8)
+    ]
+    for position in (0, 4):
+        response = client.post(f"/kitchen/schedules/{ids[position]}/cancel")
+        assert response.get_json()["status"] == "cancelled"
+    for position in (1, 5):
+        store.update(ids[position], status="progress")
+    return ids
+
+
+def test_schedule_filters_compose(client, schedules):
+    since = (START + timedelta(minutes=40)).isoformat()
+    assert listed_ids(client) == schedules
+    assert listed_ids(client, cancelled="true") == [schedules[0], schedules[4]]
+    assert listed_ids(client, cancelled="false") == [
+        schedules[position] for position in (1, 2, 3, 5, 6, 7)
+    ]
+    assert listed_ids(client, since=since) == schedules[4:]
+    assert listed_ids(client, cancelled="true", since=since) == [schedules[4]]
+    assert listed_ids(client, cancelled="true", since=since, limit=1) == [schedules[4]]
+    assert listed_ids(client, cancelled="false", since=since, limit=2) == [
+        schedules[5],
+        schedules[6],
+    ]
+    assert listed_ids(client, cancelled="true", limit=1) == [schedules[0]]
+
+
+def test_schedules_are_filtered_by_progress(client, schedules):
+    assert listed_ids(client, progress="true") == [schedules[1], schedules[5]]
+    assert listed_ids(client, progress="false") == [
+        schedules[position] for position in (0, 2, 3, 4, 6, 7)
+    ]
+    assert listed_ids(client, progress="false", cancelled="false") == [
+        schedules[position] for position in (2, 3, 6, 7)
+    ]
+    assert listed_ids(client, progress="true", cancelled="true") == []
+    assert listed_ids(client, progress="true", limit=1, since=START.isoformat()) == [
+        schedules[1]
+    ]
+
+
+def test_schedule_limit_of_zero_lists_nothing(client, schedules):
+    assert listed_ids(client, limit=0) == []
+    assert listed_ids(client, limit=0, cancelled="true") == []
+    response = client.get("/kitchen/schedules", query_string={"limit": -1})
+    assert response.status_code == 422
+
+
+def test_timezone_aware_since_is_compared_in_utc(client, schedules):
+    since = START + timedelta(minutes=40)
+    two_hours_ahead = timezone(timedelta(hours=2))
+    for value in (
+        since.replace(tzinfo=timezone.utc),
+        since.replace(tzinfo=timezone.utc).astimezone(two_hours_ahead),
+    ):
+        assert listed_ids(client, since=value.isoformat()) == schedules[4:]
+        assert listed_ids(client, since=value.isoformat(), cancelled="true") == [
+            schedules[4]
+        ]
+
+
+@pytest.fixture
+def invalid_schedules(monkeypatch):
+    """Makes the shared schema reject every schedule written to the store."""
+    from api import api
+
+    monkeypatch.setattr(
+        api.get_scheduled_order_schema,
+        "validate",
+        lambda schedule: {"status": ["Not a valid status."]},
+    )
+
+
+def test_schedule_that_fails_validation_is_not_created(
+    client, store, invalid_schedules
+):
+    response = client.post("/kitchen/schedules", json=ORDER)
+    assert response.status_code == 500
+    assert len(store) == 0
+
+
+@pytest.mark.parametrize(
+    "method, path",
+    [("put", "/kitchen/schedules/{}"), ("post", "/kitchen/schedules/{}/cancel")],
+    ids=["put", "cancel"],
+)
+def test_schedule_change_that_fails_validation_is_not_written(
+    client, store, invalid_schedules, method, path
+):
+    schedule = store.add(new_schedule())
+    response = getattr(client, method)(path.format(schedule["id"]), json=ORDER)
+    assert response.status_code == 500
+    assert store.get(schedule["id"]) == schedule
+
+
+def test_update_that_leaves_an_invalid_schedule_is_not_written(client, store):
+    # Stored schedules are only checked when written, so this one can only
+    # get here through the store
+    schedule = store.add({**new_schedule(), "status": "unknown"})
+    response = client.put(f"/kitchen/schedules/{schedule['id']}", json=ORDER)
+    assert response.status_code == 500
+    assert store.get(schedule["id"]) == schedule
+
+
+def test_schedules_are_not_validated_when_read(client, store, monkeypatch):
+    from api import api
+
+    schedule = store.add(new_schedule())
+    validated = []
+    monkeypatch.setattr(api, "validate_schedule", validated.append)
+    for path in (
+        "/kitchen/schedules",
+        f"/kitchen/schedules/{schedule['id']}",
+        f"/kitchen/schedules/{schedule['id']}/status",
+    ):
+        assert client.get(path).status_code == 200
+    assert validated == []
+    # Writes still go through validation
+    assert client.post(f"/kitchen/schedules/{schedule['id']}/cancel").status_code == 200
+    assert [written["status"] for written in validated] == ["cancelled"]
+
+
+@pytest.mark.parametrize(
+    "payload",
+    [
+        {"schedules": []},
+        {
+            "schedules": [
+                {
+                    **new_schedule(status, minutes=position),
+                    "scheduled": datetime(2026, 1, 1, 12, position, 30, 123456),
+                }
+                for position, status in enumerate(SCHEDULE_STATUSES)
+            ]
+            + [{**new_schedule(), "order": []}]
+        },
+    ],
+    ids=["no_schedules", "every_status"],
+)
+def test_fast_serialiser_dumps_like_the_schema(payload):
+    assert dump_schedules(payload) == get_scheduled_orders_schema.dump(payload)
+
+
+@pytest.fixture
+def sql_store(tmp_path, monkeypatch):
+    """
+    `SqlScheduleStore` on a SQLite database created by the migrations.
+    """
+    from alembic import command
+    from alembic.config import Config
+
+    from repository import unit_of_work
+
+    db_url = f"sqlite:///{tmp_path / 'kitchen.db'}"
+    monkeypatch.setenv("DB_URL", db_url)
+    config = Config(str(Path(__file__).parent / "alembic.ini"))
+    config.set_main_option("script_location", str(Path(__file__).parent / "migrations"))
+    command.upgrade(config, "head")
+
+    monkeypatch.setattr(unit_of_work, "DB_URL", db_url)
+    monkeypatch.setattr(unit_of_work, "engine", None)
+    monkeypatch.setattr(unit_of_work, "session_maker", None)
+    yield SqlScheduleStore()
+    unit_of_work.engine.dispose()
+
+
+def test_sql_store_behaves_like_the_in_memory_store(store, sql_store):
+    randomizer = random.Random(0)
+    ids = []
+    for _ in range(500):
+        operation = randomizer.random()
+        if operation < 0.4 or not ids:
+            schedule = new_schedule(
+                randomizer.choice(SCHEDULE_STATUSES), randomizer.randint(0, 50)
+            )
+            assert store.add(schedule) == sql_store.add(schedule)
+            ids.append(schedule["id"])
+        elif operation < 0.6:
+            schedule_id = randomizer.choice(ids)
+            changes = {"status": randomizer.choice(SCHEDULE_STATUSES)}
+            if randomizer.random() < 0.5:
+                changes["scheduled"] = START + timedelta(
+                    minutes=randomizer.randint(0, 50)
+                )
+            assert store.update(schedule_id, **changes) == sql_store.update(
+                schedule_id, **changes
+            )
+        elif operation < 0.7:
+            schedule_id = ids.pop(randomizer.randrange(len(ids)))
+            assert store.delete(schedule_id) and sql_store.delete(schedule_id)
+        else:
+            filters = {
+                "statuses": randomizer.choice(
+                    [
+                        None,
+                        [randomizer.choice(SCHEDULE_STATUSES)],
+                        randomizer.sample(SCHEDULE_STATUSES, 2),
+                    ]
+                ),
+                "since": randomizer.choice(
+                    [None, START + timedelta(minutes=randomizer.randint(0, 50))]
+                ),
+                "limit": randomizer.choice([None, 0, 5]),
+            }
+            assert store.find(**filters) == sql_store.find(**filters), filters
+        if ids and randomizer.random() < 0.1:
+            schedule_id = randomizer.choice(ids)
+            assert store.get(schedule_id) == sql_store.get(schedule_id)
+    assert len(store) == len(sql_store) == len(ids)
+
+    missing = str(uuid.uuid4())
+    assert sql_store.get(missing) is None
+    assert sql_store.update(missing, status="finished") is None
+    assert not sql_store.delete(missing)
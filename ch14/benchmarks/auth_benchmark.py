@@ -0,0 +1,83 @@
+"""
+Measures the cost of authorizing a request with and without the token
+cache. Run it from the ch14 folder:
+
+    python benchmarks/auth_benchmark.py [--requests 2000] [--output results.json]
+
+The benchmark signs its own tokens with a throwaway RSA key, so it doesn't
+need the service's private key.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import jwt
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+os.environ.setdefault("DB_URL", "sqlite://")
+os.environ["AUTH_ON"] = "True"
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from orders.web.api import auth  # noqa: E402
+from orders.web.app import app  # noqa: E402
+
+
+def generate_token(private_key):
+    now = datetime.utcnow()
+    payload = {
+        "sub": "ec7bbccf-ca89-4af3-82ac-b41e4831a962",
+        "aud": "http://127.0.0.1:8000/orders",
+        "iat": now.timestamp(),
+        "exp": (now + timedelta(hours=1)).timestamp(),
+    }
+    return jwt.encode(payload=payload, key=private_key, algorithm="RS256")
+
+
+def time_per_call(func, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - start) / iterations
+
+
+def run(iterations):
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    auth.public_key = private_key.public_key()
+    token = generate_token(private_key)
+    headers = {"Authorization": f"Bearer {token}"}
+    client = TestClient(app)
+
+    results = {}
+    for label, cache_size in (("cache_off", 0), ("cache_on", 10_000)):
+        auth.token_cache.maxsize = cache_size
+        auth.token_cache.clear()
+        results[label] = {
+            "validate_token_us": time_per_call(
+                lambda: auth.decode_and_validate_token(token), iterations
+            )
+            * 1e6,
+            "request_us": time_per_call(
+                lambda: client.get("/metrics/dependencies", headers=headers),
+                iterations,
+            )
+            * 1e6,
+        }
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--output", type=Path)
+    args = parser.parse_args()
+    results = run(args.requests)
+    print(json.dumps(results, indent=2))
+    if args.output is not None:
+        args.output.write_text(json.dumps(results, indent=2))
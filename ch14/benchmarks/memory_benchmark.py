@@ -0,0 +1,150 @@
+"""
+Measures the memory allocated while turning listed orders into domain
+objects and response payloads, with tracemalloc. Run it from the ch14 folder:
+
+    python benchmarks/memory_benchmark.py [--orders 10000] [--output results.json]
+
+"dict_based" rebuilds the previous code path, where each record went through
+OrderModel.dict() and Order(**kwargs); "from_row" uses Order.from_row. Each
+reports the domain objects alone ("objects") and the response payloads built
+from them ("payloads").
+"repository_list" measures a full OrdersRepository.list() call, and
+"repository_export" streams the same orders as NDJSON through
+OrdersRepository.export(), whose peak should not grow with --orders.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+os.environ.setdefault("DB_URL", "sqlite://")
+
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.orm import selectinload, sessionmaker  # noqa: E402
+
+from orders.orders_service.orders import Order  # noqa: E402
+from orders.repository.models import Base, OrderModel  # noqa: E402
+from orders.repository.orders_repository import OrdersRepository  # noqa: E402
+from orders.web.api.export import export_chunks  # noqa: E402
+
+
+class DictOrderItem:
+    def __init__(self, id, product, quantity, size):
+        self.id = id
+        self.product = product
+        self.quantity = quantity
+        self.size = size
+
+    def dict(self):
+        return {"product": self.product, "size": self.size, "quantity": self.quantity}
+
+
+class DictOrder:
+    def __init__(
+        self,
+        id,
+        created,
+        items,
+        status,
+        schedule_id=None,
+        delivery_id=None,
+        version=None,
+        updated=None,
+    ):
+        self.id = id
+        self.created = created
+        self.items = [DictOrderItem(**item) for item in items]
+        self.status = status
+        self.schedule_id = schedule_id
+        self.delivery_id = delivery_id
+
+    def dict(self):
+        return {
+            "id": self.id,
+            "order": [item.dict() for item in self.items],
+            "status": self.status,
+            "created": self.created,
+        }
+
+
+def measure(func):
+    # Timed without tracing, since tracemalloc slows allocations down
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    result = func()
+    current, peak = tracemalloc.get_traced_memory()
+    snapshot = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    blocks = sum(stat.count for stat in snapshot.statistics("filename"))
+    del result
+    return {
+        "seconds": elapsed,
+        "retained_bytes": current,
+        "peak_bytes": peak,
+        "retained_blocks": blocks,
+    }
+
+
+def drain(chunks):
+    return sum(len(chunk) for chunk in chunks)
+
+
+def run(number_of_orders):
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    repository = OrdersRepository(session)
+    items = [
+        {"product": "cappuccino", "size": "small", "quantity": 1},
+        {"product": "croissant", "size": "medium", "quantity": 2},
+    ]
+    repository.add_many([items] * number_of_orders, "user")
+    session.commit()
+
+    records = (
+        session.query(OrderModel)
+        .options(selectinload(OrderModel.items))
+        .filter_by(user_id="user")
+        .all()
+    )
+    results = {"orders": number_of_orders}
+    for label, build in (
+        ("dict_based", lambda record: DictOrder(**record.dict())),
+        ("from_row", Order.from_row),
+    ):
+        results[label] = {
+            "objects": measure(lambda: [build(record) for record in records]),
+            "payloads": measure(lambda: [build(record).dict() for record in records]),
+        }
+    session.close()
+
+    session = sessionmaker(bind=engine)()
+    results["repository_list"] = measure(
+        lambda: OrdersRepository(session).list(user_id="user")
+    )
+    results["repository_export"] = measure(
+        lambda: drain(
+            export_chunks(OrdersRepository(session).export(user_id="user"), "ndjson")
+        )
+    )
+    session.close()
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--orders", type=int, default=10_000)
+    parser.add_argument("--output", type=Path)
+    args = parser.parse_args()
+    results = run(args.orders)
+    print(json.dumps(results, indent=2))
+    if args.output is not None:
+        args.output.write_text(json.dumps(results, indent=2))
@@ -0,0 +1,135 @@
+"""
+Compares the throughput of the orders API with the previous
+`BaseHTTPMiddleware`-based authorization middleware and with the current
+pure ASGI one. Run it from the ch14 folder:
+
+    python benchmarks/middleware_benchmark.py [--requests 5000] [--concurrency 50] [--output results.json]
+
+Requests are sent in-process through httpx's ASGI transport, so the numbers
+reflect the cost of the application stack and not of the network.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+import httpx
+import jwt
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+os.environ.setdefault("DB_URL", "sqlite://")
+os.environ["AUTH_ON"] = "True"
+
+from starlette import status  # noqa: E402
+from starlette.middleware import Middleware  # noqa: E402
+from starlette.middleware.base import BaseHTTPMiddleware  # noqa: E402
+from starlette.responses import JSONResponse  # noqa: E402
+
+from orders.web.api import auth  # noqa: E402
+from orders.web.app import AuthorizeRequestMiddleware, app  # noqa: E402
+
+sys.path.insert(0, str(Path(__file__).parent))
+from auth_benchmark import generate_token  # noqa: E402
+
+
+class LegacyAuthorizeRequestMiddleware(BaseHTTPMiddleware):
+    """The authorization middleware as it was before the ASGI rewrite."""
+
+    async def dispatch(self, request, call_next):
+        if os.getenv("AUTH_ON", "False") != "True":
+            request.state.user_id = "test"
+            return await call_next(request)
+        if request.url.path in ["/docs/orders", "/openapi/orders.json"]:
+            return await call_next(request)
+        if request.method == "OPTIONS":
+            return await call_next(request)
+        bearer_token = request.headers.get("Authorization")
+        if not bearer_token:
+            return JSONResponse(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                content={"detail": "Missing access token"},
+            )
+        try:
+            token_payload = auth.decode_and_validate_token(
+                bearer_token.split(" ")[1].strip()
+            )
+        except jwt.PyJWTError as error:
+            return JSONResponse(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                content={"detail": str(error)},
+            )
+        request.state.user_id = token_payload["sub"]
+        return await call_next(request)
+
+
+def use_middleware(middleware_class):
+    app.user_middleware = [
+        (
+            Middleware(middleware_class)
+            if middleware.cls
+            in (AuthorizeRequestMiddleware, LegacyAuthorizeRequestMiddleware)
+            else middleware
+        )
+        for middleware in app.user_middleware
+    ]
+    app.middleware_stack = app.build_middleware_stack()
+
+
+async def requests_per_second(path, headers, total, concurrency):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        queue = asyncio.Queue()
+        for _ in range(total):
+            queue.put_nowait(None)
+
+        async def worker():
+            while not queue.empty():
+                queue.get_nowait()
+                response = await client.get(path, headers=headers)
+                assert response.status_code == 200, response.text
+
+        await client.get(path, headers=headers)
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return total / (time.perf_counter() - start)
+
+
+def run(total, concurrency, path):
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    auth.public_key = private_key.public_key()
+    headers = {"Authorization": f"Bearer {generate_token(private_key)}"}
+
+    results = {"requests": total, "concurrency": concurrency, "path": path}
+    for label, middleware_class in (
+        ("base_http_middleware", LegacyAuthorizeRequestMiddleware),
+        ("asgi_middleware", AuthorizeRequestMiddleware),
+    ):
+        use_middleware(middleware_class)
+        results[label] = {
+            "requests_per_second": asyncio.run(
+                requests_per_second(path, headers, total, concurrency)
+            )
+        }
+    results["speedup"] = (
+        results["asgi_middleware"]["requests_per_second"]
+        / results["base_http_middleware"]["requests_per_second"]
+    )
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--path", default="/metrics/dependencies")
+    parser.add_argument("--output", type=Path)
+    args = parser.parse_args()
+    results = run(args.requests, args.concurrency, args.path)
+    print(json.dumps(results, indent=2))
+    if args.output is not None:
+        args.output.write_text(json.dumps(results, indent=2))
@@ -0,0 +1,45 @@
+"""
+Stand-ins for the kitchen and payments APIs, so that the orders service can
+be load tested on its own. Run it from the ch14 folder:
+
+    uvicorn benchmarks.stubs:app --port 3000
+
+and start the orders service and the outbox dispatcher with
+KITCHEN_API_URL=http://localhost:3000 and PAYMENTS_API_URL=http://localhost:3000.
+STUB_LATENCY adds a fixed delay, in seconds, to every response, to mimic the
+round trip to the real services.
+"""
+
+import asyncio
+import os
+import uuid
+
+from fastapi import FastAPI
+from starlette import status
+
+STUB_LATENCY = float(os.getenv("STUB_LATENCY", "0"))
+
+app = FastAPI(openapi_url=None, docs_url=None, redoc_url=None)
+
+
+async def delay():
+    if STUB_LATENCY:
+        await asyncio.sleep(STUB_LATENCY)
+
+
+@app.post("/payments", status_code=status.HTTP_201_CREATED)
+async def pay_order(payload: dict):
+    await delay()
+    return {"id": str(uuid.uuid4()), "order_id": payload.get("order_id")}
+
+
+@app.post("/kitchen/schedules", status_code=status.HTTP_201_CREATED)
+async def schedule_order(payload: dict):
+    await delay()
+    return {"id": str(uuid.uuid4()), "order": payload.get("order"), "status": "pending"}
+
+
+@app.post("/kitchen/schedules/{schedule_id}/cancel")
+async def cancel_schedule(schedule_id: str, payload: dict):
+    await delay()
+    return {"id": schedule_id, "order": payload.get("order"), "status": "cancelled"}
@@ -0,0 +1,151 @@
+"""
+Micro-benchmarks of the repository, service and serialisation layers, with
+pytest-benchmark. Run them from the ch14 folder:
+
+    pytest benchmarks/test_benchmarks.py --benchmark-json=results/micro.json
+
+Save a baseline with --benchmark-autosave, and compare later runs against it
+with --benchmark-compare --benchmark-compare-fail=mean:10% to fail on
+regressions. They run against an in-memory SQLite database unless
+BENCHMARK_DB_URL points at another one, e.g. the Postgres database from
+docker-compose.
+"""
+
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+os.environ.setdefault("DB_URL", "sqlite://")
+
+import orjson  # noqa: E402
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+from sqlalchemy.pool import StaticPool  # noqa: E402
+
+from orders.orders_service.orders_service import OrdersService  # noqa: E402
+from orders.repository.cache import NullOrderCache  # noqa: E402
+from orders.repository.models import Base  # noqa: E402
+from orders.repository.orders_repository import OrdersRepository  # noqa: E402
+from orders.web.api.export import ndjson_lines  # noqa: E402
+from orders.web.api.schemas import GetOrdersSchema  # noqa: E402
+
+BENCHMARK_DB_URL = os.getenv("BENCHMARK_DB_URL")
+
+NUMBER_OF_ORDERS = 1000
+PAGE_SIZE = 50
+
+ITEMS = [
+    {"product": "cappuccino", "size": "small", "quantity": 1},
+    {"product": "croissant", "size": "medium", "quantity": 2},
+]
+
+
+@pytest.fixture(scope="module")
+def engine():
+    if BENCHMARK_DB_URL is not None:
+        engine = create_engine(BENCHMARK_DB_URL)
+    else:
+        engine = create_engine(
+            "sqlite://",
+            connect_args={"check_same_thread": False},
+            poolclass=StaticPool,
+        )
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    OrdersRepository(session).add_many([ITEMS] * NUMBER_OF_ORDERS, "user")
+    session.commit()
+    session.close()
+    yield engine
+    Base.metadata.drop_all(engine)
+    engine.dispose()
+
+
+@pytest.fixture
+def session(engine):
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.rollback()
+    session.close()
+
+
+@pytest.fixture
+def repository(session):
+    # Without the order cache, so that reads always reach the database
+    return OrdersRepository(session, NullOrderCache())
+
+
+@pytest.fixture
+def order_id(repository):
+    return repository.list(limit=1, user_id="user")[0].id
+
+
+@pytest.fixture
+def orders(repository):
+    return repository.list(limit=PAGE_SIZE, user_id="user")
+
+
+def test_repository_get(benchmark, repository, order_id):
+    order = benchmark(repository.get, order_id, user_id="user")
+    assert order.id == order_id
+
+
+def test_repository_list_page(benchmark, repository):
+    orders = benchmark(repository.list, limit=PAGE_SIZE, user_id="user")
+    assert len(orders) == PAGE_SIZE
+
+
+def test_repository_add_many(benchmark, session, repository):
+    def add_many():
+        repository.add_many([ITEMS] * PAGE_SIZE, "user")
+        session.rollback()
+
+    benchmark(add_many)
+
+
+def test_repository_update_status(benchmark, session, repository, order_id):
+    def update():
+        repository.update(order_id, user_id="user", status="paid")
+        session.rollback()
+
+    benchmark(update)
+
+
+def test_service_place_order(benchmark, session, repository):
+    orders_service = OrdersService(repository)
+
+    def place_order():
+        orders_service.place_order(ITEMS, "user")
+        session.rollback()
+
+    benchmark(place_order)
+
+
+def test_service_list_orders(benchmark, repository):
+    orders_service = OrdersService(repository)
+    orders = benchmark(orders_service.list_orders, limit=PAGE_SIZE, user_id="user")
+    assert len(orders) == PAGE_SIZE
+
+
+def test_serialise_with_response_model(benchmark, orders):
+    def serialise():
+        payload = {"orders": [order.dict() for order in orders], "next_cursor": None}
+        return GetOrdersSchema(**payload).json()
+
+    benchmark(serialise)
+
+
+def test_serialise_with_orjson(benchmark, orders):
+    def serialise():
+        payload = {"orders": [order.dict() for order in orders], "next_cursor": None}
+        return orjson.dumps(payload)
+
+    benchmark(serialise)
+
+
+def test_serialise_ndjson_export(benchmark, orders):
+    benchmark(ndjson_lines, orders)
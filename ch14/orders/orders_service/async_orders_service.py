@@ -0,0 +1,99 @@
+import asyncio
+
+from orders.orders_service.exceptions import (
+    OrderNotFoundError,
+    OrderStatusConflictError,
+)
+from orders.repository.async_orders_repository import AsyncOrdersRepository
+from orders.repository.outbox_repository import AsyncOutboxRepository
+
+
+class AsyncOrdersService:
+    """
+    Asyncio counterpart of `OrdersService`. Calls to the payments and kitchen
+    APIs are still blocking, so they're run in a worker thread.
+    """
+
+    def __init__(
+        self,
+        orders_repository: AsyncOrdersRepository,
+        outbox_repository: AsyncOutboxRepository = None,
+    ):
+        self.orders_repository = orders_repository
+        self.outbox_repository = outbox_repository
+
+    async def place_order(self, items, user_id):
+        return await self.orders_repository.add(items, user_id)
+
+    async def place_orders(self, orders, user_id):
+        return await self.orders_repository.add_many(orders, user_id)
+
+    async def get_order(self, order_id, **filters):
+        order = await self.orders_repository.get(order_id, **filters)
+        if order is not None:
+            return order
+        raise OrderNotFoundError(f"Order with id {order_id} not found")
+
+    async def update_order(self, order_id, user_id, expected_version=None, **payload):
+        order = await self.orders_repository.update(
+            order_id, user_id=user_id, expected_version=expected_version, **payload
+        )
+        if order is not None:
+            return order
+        raise OrderNotFoundError(f"Order with id {order_id} not found")
+
+    async def list_orders(self, **filters):
+        limit = filters.pop("limit", None)
+        return await self.orders_repository.list(limit=limit, **filters)
+
+    async def get_order_version(self, order_id, **filters):
+        version = await self.orders_repository.get_version(order_id, **filters)
+        if version is not None:
+            return version
+        raise OrderNotFoundError(f"Order with id {order_id} not found")
+
+    def export_orders(self, batch_size=1000, **filters):
+        return self.orders_repository.export(batch_size=batch_size, **filters)
+
+    async def list_order_versions(self, **filters):
+        limit = filters.pop("limit", None)
+        return await self.orders_repository.list_versions(limit=limit, **filters)
+
+    async def process_payment(self, order):
+        if order.status != "created":
+            raise OrderStatusConflictError(
+                f"Order with id {order.id} can't be paid, it's {order.status}"
+            )
+        await asyncio.to_thread(order.pay)
+
+    async def pay_order(self, order_id, user_id):
+        order = await self.orders_repository.update(
+            order_id, user_id=user_id, expected_status="created", status="paid"
+        )
+        if order is None:
+            raise OrderNotFoundError(f"Order with id {order_id} not found")
+        self.outbox_repository.add(
+            order_id=order.id,
+            event_type="schedule_order",
+            payload={"order": [item.dict() for item in order.items]},
+        )
+        return order
+
+    async def process_cancellation(self, order):
+        await asyncio.to_thread(order.cancel)
+
+    async def cancel_order(self, order_id, user_id, expected_status=None):
+        order = await self.orders_repository.update(
+            order_id,
+            user_id=user_id,
+            expected_status=expected_status,
+            status="cancelled",
+        )
+        if order is None:
+            raise OrderNotFoundError(f"Order with id {order_id} not found")
+        await self.outbox_repository.discard(order_id, "schedule_order")
+        return order
+
+    async def delete_order(self, order_id, user_id):
+        if not await self.orders_repository.delete(order_id, user_id=user_id):
+            raise OrderNotFoundError(f"Order with id {order_id} not found")
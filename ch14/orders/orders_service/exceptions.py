@@ -8,3 +8,15 @@ class APIIntegrationError(Exception):
 
 class InvalidActionError(Exception):
     pass
+
+
+class DependencyUnavailableError(APIIntegrationError):
+    pass
+
+
+class OrderVersionConflictError(Exception):
+    pass
+
+
+class OrderStatusConflictError(Exception):
+    pass
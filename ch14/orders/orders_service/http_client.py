@@ -0,0 +1,97 @@
+import os
+import threading
+import time
+
+import httpx
+
+from orders.orders_service.exceptions import APIIntegrationError
+
+KITCHEN_API_URL = os.getenv("KITCHEN_API_URL", "http://localhost:3000")
+PAYMENTS_API_URL = os.getenv("PAYMENTS_API_URL", "http://localhost:3001")
+
+TIMEOUT = httpx.Timeout(
+    float(os.getenv("HTTP_TIMEOUT", "5")),
+    connect=float(os.getenv("HTTP_CONNECT_TIMEOUT", "2")),
+)
+LIMITS = httpx.Limits(
+    max_connections=int(os.getenv("HTTP_MAX_CONNECTIONS", "100")),
+    max_keepalive_connections=int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "20")),
+    keepalive_expiry=30,
+)
+MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "2"))
+BACKOFF_FACTOR = float(os.getenv("HTTP_BACKOFF_FACTOR", "0.1"))
+
+# Only failures where the downstream service can't have processed the
+# request are retried, since payments and schedules aren't idempotent.
+RETRY_EXCEPTIONS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+# A 503 means the service turned the request down. After a 502 or a 504 the
+# service may have processed it anyway, so those are only retried when the
+# request carries an Idempotency-Key that lets the service spot the repeat.
+RETRY_STATUS_CODES = {503}
+IDEMPOTENT_RETRY_STATUS_CODES = {502, 503, 504}
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """
+    Returns the process-wide HTTP client, so that connections to the kitchen
+    and payments APIs are kept alive and reused across requests.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = httpx.Client(timeout=TIMEOUT, limits=LIMITS)
+    return _client
+
+
+def close_client():
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+        _client = None
+
+
+def retry_status_codes(headers):
+    if "Idempotency-Key" in httpx.Headers(headers):
+        return IDEMPOTENT_RETRY_STATUS_CODES
+    return RETRY_STATUS_CODES
+
+
+def _post(url, **kwargs):
+    retry_status = retry_status_codes(kwargs.get("headers"))
+    for attempt in range(MAX_RETRIES + 1):
+        if attempt > 0:
+            time.sleep(BACKOFF_FACTOR * 2 ** (attempt - 1))
+        try:
+            response = get_client().post(url, **kwargs)
+        except RETRY_EXCEPTIONS as error:
+            last_error = error
+            continue
+        except httpx.HTTPError as error:
+            raise APIIntegrationError(f"Request to {url} failed: {error}") from error
+        if response.status_code not in retry_status:
+            return response
+        last_error = None
+    if last_error is not None:
+        raise APIIntegrationError(
+            f"Request to {url} failed: {last_error}"
+        ) from last_error
+    return response
+
+
+def post(url, dependency, **kwargs):
+    """
+    Sends a POST request to `dependency` with the shared client, retrying
+    connection failures and 503 responses with exponential backoff. Gateway
+    errors are only retried for requests with an Idempotency-Key. Raises
+    `APIIntegrationError` if the request can't be delivered, and
+    `DependencyUnavailableError` without sending it if the dependency's
+    circuit is open or its bulkhead is full.
+    """
+    return dependency.call(
+        _post, url, is_failure=lambda response: response.status_code >= 500, **kwargs
+    )
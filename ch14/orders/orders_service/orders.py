@@ -1,20 +1,45 @@
-import requests
-
+from orders.orders_service import http_client
 from orders.orders_service.exceptions import APIIntegrationError, InvalidActionError
+from orders.orders_service.http_client import KITCHEN_API_URL, PAYMENTS_API_URL
+from orders.orders_service.resilience import kitchen, payments
 
 
 class OrderItem:
+    __slots__ = ("id", "product", "quantity", "size")
+
     def __init__(self, id, product, quantity, size):
         self.id = id
         self.product = product
         self.quantity = quantity
         self.size = size
 
+    @classmethod
+    def from_row(cls, row):
+        return cls(row.id, row.product, row.quantity, row.size)
+
     def dict(self):
         return {"product": self.product, "size": self.size, "quantity": self.quantity}
 
 
 class Order:
+    """
+    Slotted value object. `items` is a list of `OrderItem`. Use `from_row` to
+    build an order from an `OrderModel` record (or any row with the same
+    attributes) without going through intermediate dicts.
+    """
+
+    __slots__ = (
+        "_order",
+        "_id",
+        "_created",
+        "items",
+        "_status",
+        "schedule_id",
+        "delivery_id",
+        "_version",
+        "_updated",
+    )
+
     def __init__(
         self,
         id,
@@ -24,14 +49,36 @@ class Order:
         schedule_id=None,
         delivery_id=None,
         order_=None,
+        version=None,
+        updated=None,
     ):
         self._order = order_
         self._id = id
         self._created = created
-        self.items = [OrderItem(**item) for item in items]
+        self.items = items
         self._status = status
         self.schedule_id = schedule_id
         self.delivery_id = delivery_id
+        self._version = version
+        self._updated = updated
+
+    @classmethod
+    def from_row(cls, row, order_=None):
+        """
+        `order_` keeps a reference to a pending record, so that the id and
+        creation date generated on flush can be read later.
+        """
+        return cls(
+            row.id,
+            row.created,
+            [OrderItem.from_row(item) for item in row.items],
+            row.status,
+            row.schedule_id,
+            row.delivery_id,
+            order_,
+            row.version,
+            row.updated,
+        )
 
     @property
     def id(self):
@@ -45,21 +92,26 @@ class Order:
     def status(self):
         return self._status or self._order.status
 
+    @property
+    def version(self):
+        return self._version or self._order.version
+
+    @property
+    def updated(self):
+        return self._updated or self._order.updated
+
     def cancel(self):
         if self.status == "progress":
-            response = requests.post(
-                f"http://localhost:3000/kitchen/schedules/{self.schedule_id}/cancel",
-                json={"order": [item.dict() for item in self.items]},
-            )
-            if response.status_code == 200:
-                return
-            raise APIIntegrationError(f"Could not cancel order with id {self.id}")
+            self.cancel_schedule(self.schedule_id)
+            return
         if self.status == "delivery":
             raise InvalidActionError(f"Cannot cancel order with id {self.id}")
 
     def pay(self):
-        response = requests.post(
-            "http://localhost:3001/payments", json={"order_id": self.id}
+        response = http_client.post(
+            f"{PAYMENTS_API_URL}/payments",
+            json={"order_id": self.id},
+            dependency=payments,
         )
         if response.status_code == 201:
             return
@@ -67,15 +119,30 @@ class Order:
             f"Could not process payment for order with id {self.id}"
         )
 
-    def schedule(self):
-        response = requests.post(
-            "http://localhost:3000/kitchen/schedules",
+    def schedule(self, idempotency_key=None):
+        headers = {}
+        if idempotency_key is not None:
+            headers["Idempotency-Key"] = idempotency_key
+        response = http_client.post(
+            f"{KITCHEN_API_URL}/kitchen/schedules",
             json={"order": [item.dict() for item in self.items]},
+            headers=headers,
+            dependency=kitchen,
         )
         if response.status_code == 201:
             return response.json()["id"]
         raise APIIntegrationError(f"Could not schedule order with id {self.id}")
 
+    def cancel_schedule(self, schedule_id):
+        response = http_client.post(
+            f"{KITCHEN_API_URL}/kitchen/schedules/{schedule_id}/cancel",
+            json={"order": [item.dict() for item in self.items]},
+            dependency=kitchen,
+        )
+        if response.status_code == 200:
+            return
+        raise APIIntegrationError(f"Could not cancel order with id {self.id}")
+
     def dict(self):
         return {
             "id": self.id,
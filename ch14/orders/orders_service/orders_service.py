@@ -1,49 +1,122 @@
-from orders.orders_service.exceptions import OrderNotFoundError
+from orders.orders_service.exceptions import (
+    OrderNotFoundError,
+    OrderStatusConflictError,
+)
 from orders.repository.orders_repository import OrdersRepository
+from orders.repository.outbox_repository import OutboxRepository
 
 
 class OrdersService:
-    def __init__(self, orders_repository: OrdersRepository):
+    def __init__(
+        self,
+        orders_repository: OrdersRepository,
+        outbox_repository: OutboxRepository = None,
+    ):
         self.orders_repository = orders_repository
+        self.outbox_repository = outbox_repository
 
     def place_order(self, items, user_id):
         return self.orders_repository.add(items, user_id)
 
+    def place_orders(self, orders, user_id):
+        return self.orders_repository.add_many(orders, user_id)
+
     def get_order(self, order_id, **filters):
         order = self.orders_repository.get(order_id, **filters)
         if order is not None:
             return order
         raise OrderNotFoundError(f"Order with id {order_id} not found")
 
-    def update_order(self, order_id, user_id, **payload):
-        order = self.orders_repository.get(order_id, user_id=user_id)
-        if order is None:
-            raise OrderNotFoundError(f"Order with id {order_id} not found")
-        return self.orders_repository.update(order_id, **payload)
+    def update_order(self, order_id, user_id, expected_version=None, **payload):
+        order = self.orders_repository.update(
+            order_id, user_id=user_id, expected_version=expected_version, **payload
+        )
+        if order is not None:
+            return order
+        raise OrderNotFoundError(f"Order with id {order_id} not found")
 
     def list_orders(self, **filters):
         limit = filters.pop("limit", None)
         return self.orders_repository.list(limit=limit, **filters)
 
+    def get_order_version(self, order_id, **filters):
+        """
+        Returns the version and last modification date of an order, for
+        answering conditional requests without loading the order.
+        """
+        version = self.orders_repository.get_version(order_id, **filters)
+        if version is not None:
+            return version
+        raise OrderNotFoundError(f"Order with id {order_id} not found")
+
+    def export_orders(self, batch_size=1000, **filters):
+        return self.orders_repository.export(batch_size=batch_size, **filters)
+
+    def list_order_versions(self, **filters):
+        limit = filters.pop("limit", None)
+        return self.orders_repository.list_versions(limit=limit, **filters)
+
+    def process_payment(self, order):
+        """
+        Charges the order. It doesn't touch the repository, so it should be
+        called outside of a unit of work to avoid holding a database
+        connection while the payments API responds. Only orders that are
+        still "created" are charged.
+        """
+        if order.status != "created":
+            raise OrderStatusConflictError(
+                f"Order with id {order.id} can't be paid, it's {order.status}"
+            )
+        order.pay()
+
     def pay_order(self, order_id, user_id):
-        order = self.orders_repository.get(order_id, user_id=user_id)
+        """
+        Marks the order as paid and queues its scheduling with the kitchen in
+        the outbox, in the same transaction. The outbox dispatcher sends the
+        order to the kitchen and moves it to "progress". The order has been
+        charged by then, so the update only checks that it's still "created":
+        other changes made since it was read, like new items, don't stop it.
+        """
+        order = self.orders_repository.update(
+            order_id, user_id=user_id, expected_status="created", status="paid"
+        )
         if order is None:
             raise OrderNotFoundError(f"Order with id {order_id} not found")
-        order.pay()
-        schedule_id = order.schedule()
-        return self.orders_repository.update(
-            order_id, status="progress", schedule_id=schedule_id
+        self.outbox_repository.add(
+            order_id=order.id,
+            event_type="schedule_order",
+            payload={"order": [item.dict() for item in order.items]},
         )
+        return order
 
-    def cancel_order(self, order_id, user_id):
-        order = self.orders_repository.get(order_id, user_id=user_id)
+    def process_cancellation(self, order):
+        """
+        Cancels the order's schedule with the kitchen if it's in progress. Like
+        `process_payment`, it should be called outside of a unit of work.
+        """
+        order.cancel()
+
+    def cancel_order(self, order_id, user_id, expected_status=None):
+        """
+        Marks the order as cancelled and drops its scheduling from the outbox
+        if it hasn't reached the kitchen yet. Pass the status read before
+        `process_cancellation` as `expected_status`: edits made since then
+        don't stop the cancellation, but a change of status, like the
+        dispatcher scheduling the order, raises `OrderStatusConflictError`.
+        """
+        order = self.orders_repository.update(
+            order_id,
+            user_id=user_id,
+            expected_status=expected_status,
+            status="cancelled",
+        )
         if order is None:
             raise OrderNotFoundError(f"Order with id {order_id} not found")
-        order.cancel()
-        return self.orders_repository.update(order_id, status="cancelled")
+        # Paid orders that haven't reached the kitchen yet. Discarding is a
+        # no-op for any other order, so the previous status isn't needed.
+        self.outbox_repository.discard(order_id, "schedule_order")
+        return order
 
     def delete_order(self, order_id, user_id):
-        order = self.orders_repository.get(order_id, user_id=user_id)
-        if order is None:
+        if not self.orders_repository.delete(order_id, user_id=user_id):
             raise OrderNotFoundError(f"Order with id {order_id} not found")
-        return self.orders_repository.delete(order_id)
@@ -0,0 +1,167 @@
+import os
+import threading
+import time
+
+from orders.orders_service.exceptions import DependencyUnavailableError
+
+
+def _setting(dependency, name, default):
+    # KITCHEN_BULKHEAD_MAX_CONCURRENCY overrides BULKHEAD_MAX_CONCURRENCY
+    value = os.getenv(f"{dependency.upper()}_{name}", os.getenv(name, default))
+    return type(default)(value)
+
+
+class CircuitBreaker:
+    """
+    Stops calling a dependency after `failure_threshold` consecutive failures.
+    Once `reset_timeout` seconds have passed, up to `half_open_max_calls`
+    probe calls are let through: a successful probe closes the circuit again,
+    and a failed one opens it for another `reset_timeout`.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0, half_open_max_calls=1):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self.probes = 0
+        self._lock = threading.Lock()
+
+    def allow_request(self):
+        with self._lock:
+            if self.state == self.OPEN:
+                if time.monotonic() - self.opened_at < self.reset_timeout:
+                    return False
+                self.state = self.HALF_OPEN
+                self.probes = 0
+            if self.state == self.HALF_OPEN:
+                if self.probes >= self.half_open_max_calls:
+                    return False
+                self.probes += 1
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+
+class Bulkhead:
+    """
+    Caps the number of concurrent calls to a dependency, so that a slow
+    dependency can't tie up every worker thread. Callers wait at most
+    `max_wait` seconds for a free slot.
+    """
+
+    def __init__(self, max_concurrency=10, max_wait=0.1):
+        self.max_concurrency = max_concurrency
+        self.max_wait = max_wait
+        self.active = 0
+        self._semaphore = threading.BoundedSemaphore(max_concurrency)
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if not self._semaphore.acquire(timeout=self.max_wait):
+            return False
+        with self._lock:
+            self.active += 1
+        return True
+
+    def release(self):
+        with self._lock:
+            self.active -= 1
+        self._semaphore.release()
+
+
+class Dependency:
+    """
+    Guards the calls to a downstream service with a bulkhead and a circuit
+    breaker, and keeps counters of the outcomes.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.breaker = CircuitBreaker(
+            failure_threshold=_setting(name, "CIRCUIT_BREAKER_FAILURE_THRESHOLD", 5),
+            reset_timeout=_setting(name, "CIRCUIT_BREAKER_RESET_TIMEOUT", 30.0),
+            half_open_max_calls=_setting(name, "CIRCUIT_BREAKER_HALF_OPEN_CALLS", 1),
+        )
+        self.bulkhead = Bulkhead(
+            max_concurrency=_setting(name, "BULKHEAD_MAX_CONCURRENCY", 10),
+            max_wait=_setting(name, "BULKHEAD_MAX_WAIT", 0.1),
+        )
+        self.counters = dict.fromkeys(
+            ["calls", "successes", "failures", "rejected_open", "rejected_full"], 0
+        )
+        self._lock = threading.Lock()
+
+    def _count(self, counter):
+        with self._lock:
+            self.counters[counter] += 1
+
+    def call(self, func, *args, is_failure=lambda result: False, **kwargs):
+        """
+        Calls `func` unless the circuit is open or the bulkhead is full, in
+        which case `DependencyUnavailableError` is raised straight away.
+        Exceptions raised by `func` and results for which `is_failure`
+        returns True count as failures.
+        """
+        if not self.bulkhead.acquire():
+            self._count("rejected_full")
+            raise DependencyUnavailableError(
+                f"Too many concurrent calls to {self.name}"
+            )
+        try:
+            # The breaker is asked once a slot is held: a call turned down by
+            # the bulkhead must not take a half-open probe it will never report
+            if not self.breaker.allow_request():
+                self._count("rejected_open")
+                raise DependencyUnavailableError(f"Circuit for {self.name} is open")
+            self._count("calls")
+            try:
+                result = func(*args, **kwargs)
+            except Exception:
+                self._count("failures")
+                self.breaker.record_failure()
+                raise
+        finally:
+            self.bulkhead.release()
+        if is_failure(result):
+            self._count("failures")
+            self.breaker.record_failure()
+        else:
+            self._count("successes")
+            self.breaker.record_success()
+        return result
+
+    def stats(self):
+        return {
+            "state": self.breaker.state,
+            "consecutive_failures": self.breaker.failures,
+            "active_calls": self.bulkhead.active,
+            "max_concurrency": self.bulkhead.max_concurrency,
+            **self.counters,
+        }
+
+
+kitchen = Dependency("kitchen")
+payments = Dependency("payments")
+
+dependencies = {dependency.name: dependency for dependency in (kitchen, payments)}
+
+
+def dependency_stats():
+    return {name: dependency.stats() for name, dependency in dependencies.items()}
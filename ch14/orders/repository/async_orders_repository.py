@@ -0,0 +1,168 @@
+from sqlalchemy import delete, insert, select
+
+from orders.orders_service.orders import Order, OrderItem
+from orders.repository import cache
+from orders.repository.cache import cache_key, invalidate_on_commit
+from orders.repository.models import OrderModel, OrderItemModel
+from orders.repository.orders_repository import (
+    ITEM_COLUMNS,
+    ORDER_COLUMNS,
+    VERSION_COLUMNS,
+    bulk_rows,
+    conflict_error,
+    delete_statements,
+    export_statement,
+    listing,
+    load_items,
+    order_from_columns,
+    order_from_export_rows,
+    orders_from_rows,
+    owned_by,
+    replacement_item_rows,
+    supports_returning,
+    update_statement,
+)
+
+
+class AsyncOrdersRepository:
+    """
+    Asyncio counterpart of `OrdersRepository`. Lazy loading isn't available
+    on an `AsyncSession`, so order items are always loaded eagerly.
+    """
+
+    def __init__(self, session, order_cache=None):
+        self.session = session
+        self.cache = order_cache if order_cache is not None else cache.order_cache
+
+    async def add(self, items, user_id):
+        record = OrderModel(
+            items=[OrderItemModel(**item) for item in items], user_id=user_id
+        )
+        self.session.add(record)
+        await self.session.flush()
+        return Order.from_row(record, order_=record)
+
+    async def add_many(self, orders, user_id):
+        order_rows, item_rows = bulk_rows(orders, user_id)
+        await self.session.execute(insert(OrderModel), order_rows)
+        await self.session.execute(insert(OrderItemModel), item_rows)
+        return orders_from_rows(order_rows, item_rows)
+
+    async def _get(self, id_, load_strategy="joined", **filters):
+        result = await self.session.execute(
+            select(OrderModel)
+            .options(load_items(load_strategy))
+            .filter(OrderModel.id == str(id_))
+            .filter_by(**filters)
+        )
+        return result.unique().scalars().first()
+
+    async def get(self, id_, load_strategy="joined", **filters):
+        """
+        Lookups filtered by `user_id` alone are read through the order cache.
+        """
+        key = cache_key(id_, filters)
+        if key is not None:
+            order, generation = self.cache.lookup(key)
+            if order is not None:
+                return order
+        record = await self._get(id_, load_strategy=load_strategy, **filters)
+        if record is None:
+            return None
+        order = Order.from_row(record)
+        if key is not None:
+            # Skipped by the cache if the order was invalidated since the
+            # lookup, as this read may predate the write
+            self.cache.set(key, order, generation)
+        return order
+
+    async def list(
+        self, limit=None, cursor=None, load_strategy="selectin", **filters
+    ):
+        query = select(OrderModel).options(load_items(load_strategy))
+        result = await self.session.execute(listing(query, limit, cursor, filters))
+        return [Order.from_row(record) for record in result.unique().scalars()]
+
+    async def get_version(self, id_, **filters):
+        key = cache_key(id_, filters)
+        if key is not None:
+            order = self.cache.get(key)
+            if order is not None:
+                return order
+        result = await self.session.execute(
+            select(OrderModel.version, OrderModel.updated)
+            .filter(OrderModel.id == str(id_))
+            .filter_by(**filters)
+        )
+        return result.first()
+
+    async def list_versions(self, limit=None, cursor=None, **filters):
+        query = select(*VERSION_COLUMNS)
+        result = await self.session.execute(listing(query, limit, cursor, filters))
+        return result.all()
+
+    async def export(self, batch_size=1000, **filters):
+        result = await self.session.stream(export_statement(filters, batch_size))
+        order_rows = []
+        async for row in result:
+            if order_rows and row.id != order_rows[0].id:
+                yield order_from_export_rows(order_rows)
+                order_rows = []
+            order_rows.append(row)
+        if order_rows:
+            yield order_from_export_rows(order_rows)
+
+    async def update(
+        self, id_, user_id=None, expected_version=None, expected_status=None, **payload
+    ):
+        items = payload.pop("items", None)
+        statement = update_statement(
+            id_, user_id, expected_version, payload, expected_status
+        )
+        if supports_returning(self.session):
+            result = await self.session.execute(statement.returning(*ORDER_COLUMNS))
+            row = result.first()
+        elif (await self.session.execute(statement)).rowcount > 0:
+            result = await self.session.execute(
+                select(*ORDER_COLUMNS).where(OrderModel.id == str(id_))
+            )
+            row = result.first()
+        else:
+            row = None
+        if row is None:
+            guarded = expected_version is not None or expected_status is not None
+            if guarded and await self._exists(id_, user_id):
+                raise conflict_error(id_, expected_version, expected_status)
+            return None
+        invalidate_on_commit(self.session, self.cache, row.user_id, row.id)
+        if items is None:
+            result = await self.session.execute(
+                select(*ITEM_COLUMNS).where(OrderItemModel.order_id == row.id)
+            )
+            items = [OrderItem.from_row(item) for item in result]
+        else:
+            item_rows = replacement_item_rows(row.id, items)
+            await self.session.execute(
+                delete(OrderItemModel.__table__).where(
+                    OrderItemModel.order_id == row.id
+                )
+            )
+            await self.session.execute(insert(OrderItemModel.__table__), item_rows)
+            items = [
+                OrderItem(item["id"], item["product"], item["quantity"], item["size"])
+                for item in item_rows
+            ]
+        return order_from_columns(row, items)
+
+    async def _exists(self, id_, user_id):
+        statement = owned_by(select(OrderModel.id), id_, user_id)
+        return (await self.session.execute(statement)).first() is not None
+
+    async def delete(self, id_, user_id):
+        delete_items, delete_order = delete_statements(id_, user_id)
+        await self.session.execute(delete_items)
+        result = await self.session.execute(delete_order)
+        if result.rowcount == 0:
+            return False
+        invalidate_on_commit(self.session, self.cache, user_id, id_)
+        return True
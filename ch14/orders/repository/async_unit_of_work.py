@@ -0,0 +1,77 @@
+import os
+
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from orders.repository.cache import discard_after_commit_hooks, run_after_commit_hooks
+from orders.repository.unit_of_work import DB_URL, pool_options, pool_stats
+
+
+ASYNC_DRIVERS = {
+    'postgresql': 'postgresql+asyncpg',
+    'sqlite': 'sqlite+aiosqlite',
+}
+
+
+def async_db_url():
+    """
+    Returns the URL for the asyncio engine. ASYNC_DB_URL takes precedence;
+    otherwise DB_URL is reused with its driver swapped for an asyncio one.
+    The URL object is returned as is: rendering it with str() would mask
+    the password.
+    """
+    url = os.getenv('ASYNC_DB_URL')
+    if url is not None:
+        return url
+    url = make_url(DB_URL)
+    return url.set(drivername=ASYNC_DRIVERS[url.get_backend_name()])
+
+
+engine = None
+session_maker = None
+
+
+def init_async_engine():
+    global engine, session_maker
+    if engine is None:
+        engine = create_async_engine(async_db_url(), **pool_options())
+        session_maker = sessionmaker(
+            bind=engine, class_=AsyncSession, expire_on_commit=False
+        )
+    return engine
+
+
+async def dispose_async_engine():
+    global engine, session_maker
+    if engine is not None:
+        await engine.dispose()
+    engine = None
+    session_maker = None
+
+
+def async_pool_stats():
+    return pool_stats(engine.sync_engine if engine is not None else None)
+
+
+class AsyncUnitOfWork:
+    def __init__(self):
+        init_async_engine()
+        self.session_maker = session_maker
+
+    async def __aenter__(self):
+        self.session = self.session_maker()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, traceback):
+        if exc_type is not None:
+            await self.rollback()
+        await self.session.close()
+
+    async def commit(self):
+        await self.session.commit()
+        run_after_commit_hooks(self.session)
+
+    async def rollback(self):
+        await self.session.rollback()
+        discard_after_commit_hooks(self.session)
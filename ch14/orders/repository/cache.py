@@ -0,0 +1,234 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+from orders.orders_service.orders import Order, OrderItem
+
+
+def dump_order(order):
+    return {
+        "id": order.id,
+        "created": order.created.isoformat(),
+        "items": [
+            [item.id, item.product, item.quantity, item.size] for item in order.items
+        ],
+        "status": order.status,
+        "schedule_id": order.schedule_id,
+        "delivery_id": order.delivery_id,
+        "version": order.version,
+        "updated": order.updated.isoformat(),
+    }
+
+
+def load_order(data):
+    return Order(
+        data["id"],
+        datetime.fromisoformat(data["created"]),
+        [OrderItem(*item) for item in data["items"]],
+        data["status"],
+        data["schedule_id"],
+        data["delivery_id"],
+        version=data["version"],
+        updated=datetime.fromisoformat(data["updated"]),
+    )
+
+
+# Every cached order is stored with the generation of its key, which is bumped
+# each time the order is invalidated. A reader takes the generation with its
+# lookup, before reading the database, and hands it back to `set()`. If a
+# writer invalidated the order in the meantime, the generation has moved on
+# and the order read before the write is never served.
+
+
+class NullOrderCache:
+    """Cache backend that never stores anything."""
+
+    def lookup(self, key):
+        return None, None
+
+    def get(self, key):
+        return None
+
+    def set(self, key, order, generation=None):
+        pass
+
+    def delete(self, *keys):
+        pass
+
+
+class LRUOrderCache:
+    """
+    Bounded in-process LRU cache of orders. Entries expire after `ttl`
+    seconds. Invalidations only reach the current process, so it can't be
+    used when orders are also written by other processes, like the outbox
+    dispatcher.
+    """
+
+    def __init__(self, maxsize=10_000, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        # key -> (expires, generation, data); data is None once invalidated
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _entry(self, key):
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] <= time.time():
+            del self._entries[key]
+            return None
+        return entry
+
+    def lookup(self, key):
+        """
+        Returns the cached order, or None, and the generation to pass to
+        `set()` on a miss.
+        """
+        with self._lock:
+            entry = self._entry(key)
+            if entry is None:
+                return None, 0
+            _, generation, data = entry
+            self._entries.move_to_end(key)
+        return (load_order(data) if data is not None else None), generation
+
+    def get(self, key):
+        return self.lookup(key)[0]
+
+    def set(self, key, order, generation=0):
+        """
+        Caches `order` unless the key was invalidated since `generation` was
+        looked up.
+        """
+        data = dump_order(order)
+        with self._lock:
+            entry = self._entry(key)
+            if (entry[1] if entry is not None else 0) != generation:
+                return
+            self._store(key, generation, data)
+
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                entry = self._entry(key)
+                # Kept as a marker, so that reads in flight can't be cached
+                self._store(key, (entry[1] if entry is not None else 0) + 1, None)
+
+    def _store(self, key, generation, data):
+        self._entries[key] = (time.time() + self.ttl, generation, data)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class RedisOrderCache:
+    """
+    Order cache shared by all processes through a Redis-compatible server.
+    `client` needs the `mget`, `set(name, value, ex=...)`, `incr` and
+    `expire` methods of `redis.Redis`.
+
+    The generation of each order is a counter of its own, incremented on
+    invalidation, and cached orders are stored with the generation they were
+    read at. A lookup fetches both in one MGET.
+    """
+
+    def __init__(self, client, ttl=60, prefix="orders:order:"):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def _names(self, key):
+        user_id, order_id = key
+        name = f"{self.prefix}{user_id}:{order_id}"
+        return name, f"{name}:generation"
+
+    def _expiry(self):
+        return max(int(self.ttl), 1)
+
+    def lookup(self, key):
+        value, generation = self.client.mget(*self._names(key))
+        generation = int(generation) if generation is not None else 0
+        if value is None:
+            return None, generation
+        value = json.loads(value)
+        if value["generation"] != generation:
+            return None, generation
+        return load_order(value["order"]), generation
+
+    def get(self, key):
+        return self.lookup(key)[0]
+
+    def set(self, key, order, generation=0):
+        # Orders set with an old generation are never returned by lookup(),
+        # so they don't need to be kept out of the cache here
+        value = {"generation": generation, "order": dump_order(order)}
+        self.client.set(self._names(key)[0], json.dumps(value), ex=self._expiry())
+
+    def delete(self, *keys):
+        # The counters are kept twice as long as the orders, so that orders
+        # stored with a previous value expire before the counter restarts
+        for key in keys:
+            _, generation_name = self._names(key)
+            self.client.incr(generation_name)
+            self.client.expire(generation_name, 2 * self._expiry())
+
+
+def cache_key(order_id, filters):
+    """
+    Returns the `(user_id, order_id)` key of a lookup, or None if the lookup
+    has other filters and can't be served from the cache.
+    """
+    if set(filters) != {"user_id"}:
+        return None
+    return str(filters["user_id"]), str(order_id)
+
+
+def invalidate_on_commit(session, cache, user_id, order_id):
+    """
+    Schedules the removal of an order from `cache` once the unit of work
+    that holds `session` commits.
+    """
+    session.info.setdefault("after_commit", []).append(
+        lambda: cache.delete((str(user_id), str(order_id)))
+    )
+
+
+def run_after_commit_hooks(session):
+    for hook in session.info.pop("after_commit", []):
+        hook()
+
+
+def discard_after_commit_hooks(session):
+    session.info.pop("after_commit", None)
+
+
+def cache_from_env():
+    """
+    ORDERS_CACHE_BACKEND selects the backend: "none" (default), "memory" or
+    "redis". The Redis backend connects to ORDERS_CACHE_URL. "memory" only
+    suits a single API process that is the only writer of orders; with the
+    outbox dispatcher, use "redis" in both the API and the dispatcher.
+    """
+    backend = os.getenv("ORDERS_CACHE_BACKEND", "none")
+    ttl = float(os.getenv("ORDERS_CACHE_TTL", "60"))
+    if backend == "none":
+        return NullOrderCache()
+    if backend == "memory":
+        return LRUOrderCache(
+            maxsize=int(os.getenv("ORDERS_CACHE_SIZE", "10000")), ttl=ttl
+        )
+    if backend == "redis":
+        import redis
+
+        url = os.getenv("ORDERS_CACHE_URL", "redis://localhost:6379/0")
+        return RedisOrderCache(redis.Redis.from_url(url), ttl=ttl)
+    raise ValueError(f"Unknown ORDERS_CACHE_BACKEND: {backend}")
+
+
+order_cache = cache_from_env()
@@ -0,0 +1,105 @@
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+
+class QueryCounter:
+    def __init__(self):
+        self.executions = []
+
+    @property
+    def statements(self):
+        return [statement for statement, _ in self.executions]
+
+    @property
+    def count(self):
+        return len(self.executions)
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.executions.append((statement, parameters))
+
+
+@contextmanager
+def count_queries(engine):
+    """
+    Records every SQL statement that `engine` sends to the database while the
+    context is active.
+
+        with count_queries(engine) as counter:
+            repository.list(user_id="user")
+        assert counter.count == 2
+    """
+    counter = QueryCounter()
+    event.listen(engine, "before_cursor_execute", counter)
+    try:
+        yield counter
+    finally:
+        event.remove(engine, "before_cursor_execute", counter)
+
+
+@contextmanager
+def assert_num_queries(engine, expected):
+    """
+    Fails if the block issues a number of statements other than `expected`.
+    """
+    with count_queries(engine) as counter:
+        yield counter
+    assert counter.count == expected, (
+        f"Expected {expected} queries, got {counter.count}:\n"
+        + "\n".join(counter.statements)
+    )
+
+
+def explain(connection, statement, parameters=()):
+    """
+    Returns the query plan of a raw SQL statement as the database reports it:
+    the detail lines of EXPLAIN QUERY PLAN on SQLite, and the JSON plan tree
+    on Postgres.
+    """
+    dialect = connection.dialect.name
+    if dialect == "sqlite":
+        result = connection.exec_driver_sql(
+            f"EXPLAIN QUERY PLAN {statement}", parameters
+        )
+        return [row[-1] for row in result]
+    if dialect == "postgresql":
+        result = connection.exec_driver_sql(
+            f"EXPLAIN (FORMAT JSON) {statement}", parameters
+        )
+        return result.scalar()[0]["Plan"]
+    raise NotImplementedError(f"EXPLAIN is not supported for {dialect}")
+
+
+def _postgres_seq_scans(plan):
+    if plan["Node Type"] == "Seq Scan":
+        yield plan["Relation Name"]
+    for subplan in plan.get("Plans", []):
+        yield from _postgres_seq_scans(subplan)
+
+
+def sequential_scans(connection, statement, parameters=()):
+    """
+    Returns the tables that the database would read with a full table scan
+    to run `statement`.
+
+    Planners prefer sequential scans on small tables, so on Postgres they're
+    disabled for the duration of the check: a sequential scan in the plan
+    then means that no index can serve the query.
+    """
+    if connection.dialect.name == "postgresql":
+        with connection.begin():
+            connection.exec_driver_sql("SET LOCAL enable_seqscan = off")
+            plan = explain(connection, statement, parameters)
+        return list(_postgres_seq_scans(plan))
+    scans, subqueries = [], set()
+    for detail in explain(connection, statement, parameters):
+        words = detail.split()
+        # "SCAN order" is a full table scan, "SCAN order USING INDEX ..." is
+        # a scan of an index, and "SEARCH ..." is an index lookup. Scanning
+        # the rows of a subquery (a co-routine) doesn't touch any table.
+        if words[0] in ("CO-ROUTINE", "MATERIALIZE"):
+            subqueries.add(words[1])
+        elif words[0] == "SCAN" and "USING" not in words:
+            if words[1] not in subqueries:
+                scans.append(words[1].strip('"'))
+    return scans
@@ -1,7 +1,7 @@
 import uuid
 from datetime import datetime
 
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime
+from sqlalchemy import JSON, Column, Integer, String, ForeignKey, DateTime, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 
@@ -22,6 +22,16 @@ class OrderModel(Base):
     created = Column(DateTime, default=datetime.utcnow)
     schedule_id = Column(String)
     delivery_id = Column(String)
+    # Bumped on every change. Serves as the order's ETag.
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    updated = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        # Serves the keyset pagination of a user's orders by (created, id)
+        Index("ix_order_user_id_created_id", "user_id", "created", "id"),
+        # Serves the cancelled filter on a user's orders
+        Index("ix_order_user_id_status", "user_id", "status"),
+    )
 
     def dict(self):
         return {
@@ -31,6 +41,8 @@ class OrderModel(Base):
             "created": self.created,
             "schedule_id": self.schedule_id,
             "delivery_id": self.delivery_id,
+            "version": self.version,
+            "updated": self.updated,
         }
 
 
@@ -38,7 +50,7 @@ class OrderItemModel(Base):
     __tablename__ = "order_item"
 
     id = Column(String, primary_key=True, default=generate_uuid)
-    order_id = Column(String, ForeignKey("order.id"))
+    order_id = Column(String, ForeignKey("order.id"), index=True)
     product = Column(String, nullable=False)
     size = Column(String, nullable=False)
     quantity = Column(Integer, nullable=False)
@@ -50,3 +62,31 @@ class OrderItemModel(Base):
             "size": self.size,
             "quantity": self.quantity,
         }
+
+
+class OutboxMessageModel(Base):
+    __tablename__ = "outbox"
+
+    id = Column(String, primary_key=True, default=generate_uuid)
+    order_id = Column(String, nullable=False, index=True)
+    event_type = Column(String, nullable=False)
+    payload = Column(JSON, nullable=False)
+    idempotency_key = Column(String, nullable=False, unique=True, default=generate_uuid)
+    created = Column(DateTime, nullable=False, default=datetime.utcnow)
+    dispatched = Column(DateTime)
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(String)
+    # Set while a dispatcher delivers the message, so that other dispatchers
+    # skip it without the row being locked during the delivery
+    claimed_until = Column(DateTime)
+
+    __table_args__ = (
+        # Only undispatched messages are indexed, so draining stays cheap
+        # however many dispatched messages the table keeps.
+        Index(
+            "ix_outbox_pending",
+            "created",
+            postgresql_where=dispatched.is_(None),
+            sqlite_where=dispatched.is_(None),
+        ),
+    )
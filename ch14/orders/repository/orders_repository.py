@@ -1,51 +1,397 @@
-from orders.orders_service.orders import Order
-from orders.repository.models import OrderModel, OrderItemModel
+from datetime import datetime
+from itertools import groupby
+from operator import attrgetter
+
+from sqlalchemy import delete, insert, select, tuple_, update
+from sqlalchemy.orm import joinedload, selectinload
+
+from orders.orders_service.exceptions import (
+    OrderStatusConflictError,
+    OrderVersionConflictError,
+)
+from orders.orders_service.orders import Order, OrderItem
+from orders.repository import cache
+from orders.repository.cache import cache_key, invalidate_on_commit
+from orders.repository.models import OrderModel, OrderItemModel, generate_uuid
+
+
+# Eager loading strategies for order items. "selectin" loads the items of all
+# the selected orders with one extra SELECT ... WHERE order_id IN (...), which
+# plays well with LIMIT. "joined" fetches everything in a single LEFT OUTER
+# JOIN, which is cheaper for single-order lookups.
+ITEM_LOADERS = {
+    "selectin": selectinload,
+    "joined": joinedload,
+}
+
+
+def load_items(strategy):
+    try:
+        return ITEM_LOADERS[strategy](OrderModel.items)
+    except KeyError:
+        raise ValueError(f"Unknown item loading strategy: {strategy}")
+
+
+def bulk_rows(orders, user_id):
+    # Primary keys and timestamps are generated here rather than by the
+    # database so that rows can be inserted in bulk and linked without
+    # reading anything back.
+    created = datetime.utcnow()
+    order_rows, item_rows = [], []
+    for items in orders:
+        order_id = generate_uuid()
+        order_rows.append(
+            {
+                "id": order_id,
+                "user_id": user_id,
+                "status": "created",
+                "created": created,
+                "version": 1,
+                "updated": created,
+            }
+        )
+        item_rows.extend(
+            {"id": generate_uuid(), "order_id": order_id, **item} for item in items
+        )
+    return order_rows, item_rows
+
+
+def orders_from_rows(order_rows, item_rows):
+    items_by_order = {row["id"]: [] for row in order_rows}
+    for row in item_rows:
+        items_by_order[row["order_id"]].append(
+            OrderItem(row["id"], row["product"], row["quantity"], row["size"])
+        )
+    return [
+        Order(
+            row["id"],
+            row["created"],
+            items_by_order[row["id"]],
+            row["status"],
+            version=row["version"],
+            updated=row["updated"],
+        )
+        for row in order_rows
+    ]
+
+
+VERSION_COLUMNS = (
+    OrderModel.id,
+    OrderModel.created,
+    OrderModel.version,
+)
+
+
+def listing(query, limit, cursor, filters):
+    """
+    Applies the filters, keyset cursor and sort order of an order listing to
+    an ORM query or a select().
+    """
+    if cursor is not None:
+        query = query.filter(tuple_(OrderModel.created, OrderModel.id) < cursor)
+    if "cancelled" in filters:
+        filters = dict(filters)
+        cancelled = filters.pop("cancelled")
+        if cancelled:
+            query = query.filter(OrderModel.status == "cancelled")
+        else:
+            query = query.filter(OrderModel.status != "cancelled")
+    return (
+        query.filter_by(**filters)
+        .order_by(OrderModel.created.desc(), OrderModel.id.desc())
+        .limit(limit)
+    )
+
+
+# Columns returned by the single-statement mutations
+ORDER_COLUMNS = (
+    OrderModel.id,
+    OrderModel.user_id,
+    OrderModel.created,
+    OrderModel.status,
+    OrderModel.schedule_id,
+    OrderModel.delivery_id,
+    OrderModel.version,
+    OrderModel.updated,
+)
+
+ITEM_COLUMNS = (
+    OrderItemModel.id,
+    OrderItemModel.product,
+    OrderItemModel.quantity,
+    OrderItemModel.size,
+)
+
+
+def supports_returning(session):
+    dialect = session.bind.dialect
+    # `full_returning` is deprecated in SQLAlchemy 2.0, which replaces it
+    # with one flag per statement type
+    if hasattr(dialect, "update_returning"):
+        return dialect.update_returning
+    return dialect.full_returning
+
+
+def owned_by(statement, id_, user_id):
+    statement = statement.where(OrderModel.id == str(id_))
+    if user_id is not None:
+        statement = statement.where(OrderModel.user_id == user_id)
+    return statement
+
+
+def update_statement(id_, user_id, expected_version, values, expected_status=None):
+    """
+    UPDATE "order" SET ..., version = version + 1
+    WHERE id = :id AND user_id = :user_id AND version = :expected_version
+    AND status = :expected_status
+    """
+    statement = owned_by(update(OrderModel.__table__), id_, user_id).values(
+        version=OrderModel.version + 1, updated=datetime.utcnow(), **values
+    )
+    if expected_version is not None:
+        statement = statement.where(OrderModel.version == expected_version)
+    if expected_status is not None:
+        statement = statement.where(OrderModel.status == expected_status)
+    return statement
+
+
+def conflict_error(id_, expected_version, expected_status):
+    """
+    Returns the error for an order that exists but wasn't updated because
+    of `expected_version` or `expected_status`.
+    """
+    if expected_status is not None:
+        return OrderStatusConflictError(
+            f"Order with id {id_} is no longer {expected_status}"
+        )
+    return OrderVersionConflictError(
+        f"Order with id {id_} is no longer at version {expected_version}"
+    )
+
+
+def delete_statements(id_, user_id):
+    """
+    Deletes an order and its items with one statement each. The items are
+    only deleted if the order belongs to `user_id`.
+    """
+    owned_order = owned_by(select(OrderModel.id), id_, user_id)
+    return (
+        delete(OrderItemModel.__table__).where(
+            OrderItemModel.order_id.in_(owned_order.scalar_subquery())
+        ),
+        owned_by(delete(OrderModel.__table__), id_, user_id),
+    )
+
+
+def replacement_item_rows(order_id, items):
+    return [{"id": generate_uuid(), "order_id": order_id, **item} for item in items]
+
+
+def order_from_columns(row, items):
+    return Order(
+        row.id,
+        row.created,
+        items,
+        row.status,
+        row.schedule_id,
+        row.delivery_id,
+        version=row.version,
+        updated=row.updated,
+    )
+
+
+EXPORT_ITEM_COLUMNS = (
+    OrderItemModel.id.label("item_id"),
+    OrderItemModel.product,
+    OrderItemModel.quantity,
+    OrderItemModel.size,
+)
+
+
+def export_statement(filters, batch_size):
+    """
+    Orders joined to their items, one row per item, in listing order. The
+    rows of an order are consecutive, so orders can be rebuilt one at a time
+    while the result is streamed from a server-side cursor `batch_size` rows
+    at a time.
+    """
+    query = select(*ORDER_COLUMNS, *EXPORT_ITEM_COLUMNS)
+    return (
+        listing(query, None, None, filters)
+        .outerjoin(OrderItemModel)
+        .execution_options(yield_per=batch_size)
+    )
+
+
+def order_from_export_rows(rows):
+    items = [
+        OrderItem(row.item_id, row.product, row.quantity, row.size)
+        for row in rows
+        if row.item_id is not None
+    ]
+    return order_from_columns(rows[0], items)
 
 
 class OrdersRepository:
-    def __init__(self, session):
+    def __init__(self, session, order_cache=None):
         self.session = session
+        self.cache = order_cache if order_cache is not None else cache.order_cache
 
     def add(self, items, user_id):
         record = OrderModel(
             items=[OrderItemModel(**item) for item in items], user_id=user_id
         )
         self.session.add(record)
-        return Order(**record.dict(), order_=record)
+        return Order.from_row(record, order_=record)
 
-    def _get(self, id_, **filters):
+    def add_many(self, orders, user_id):
+        """
+        Inserts several orders with two executemany statements, one for the
+        orders and one for their items, instead of flushing each order.
+        `orders` is a list of lists of items.
+        """
+        order_rows, item_rows = bulk_rows(orders, user_id)
+        self.session.execute(insert(OrderModel), order_rows)
+        self.session.execute(insert(OrderItemModel), item_rows)
+        return orders_from_rows(order_rows, item_rows)
+
+    def _get(self, id_, load_strategy="joined", **filters):
         return (
             self.session.query(OrderModel)
+            .options(load_items(load_strategy))
+            .filter(OrderModel.id == str(id_))
+            .filter_by(**filters)
+            .first()
+        )
+
+    def get(self, id_, load_strategy="joined", **filters):
+        """
+        Lookups filtered by `user_id` alone are read through the order cache.
+        """
+        key = cache_key(id_, filters)
+        if key is not None:
+            order, generation = self.cache.lookup(key)
+            if order is not None:
+                return order
+        record = self._get(id_, load_strategy=load_strategy, **filters)
+        if record is None:
+            return None
+        order = Order.from_row(record)
+        if key is not None:
+            # Skipped by the cache if the order was invalidated since the
+            # lookup, as this read may predate the write
+            self.cache.set(key, order, generation)
+        return order
+
+    def list(self, limit=None, cursor=None, load_strategy="selectin", **filters):
+        """
+        Lists orders sorted by creation date, most recent first. `cursor` is
+        the `(created, id)` pair of the last order of the previous page, so
+        that every page is a range scan on the (user_id, created, id) index.
+        """
+        query = self.session.query(OrderModel).options(load_items(load_strategy))
+        records = listing(query, limit, cursor, filters).all()
+        return [Order.from_row(record) for record in records]
+
+    def get_version(self, id_, **filters):
+        """
+        Returns the `version` and `updated` columns of an order without
+        loading its items, or None if there's no such order.
+        """
+        key = cache_key(id_, filters)
+        if key is not None:
+            order = self.cache.get(key)
+            if order is not None:
+                return order
+        return (
+            self.session.query(OrderModel.version, OrderModel.updated)
             .filter(OrderModel.id == str(id_))
             .filter_by(**filters)
             .first()
         )
 
-    def get(self, id_, **filters):
-        order = self._get(id_, **filters)
-        if order is not None:
-            return Order(**order.dict())
-
-    def list(self, limit=None, **filters):
-        query = self.session.query(OrderModel)
-        if "cancelled" in filters:
-            cancelled = filters.pop("cancelled")
-            if cancelled:
-                query = query.filter(OrderModel.status == "cancelled")
-            else:
-                query = query.filter(OrderModel.status != "cancelled")
-        records = query.filter_by(**filters).limit(limit).all()
-        return [Order(**record.dict()) for record in records]
-
-    def update(self, id_, **payload):
-        record = self._get(id_)
-        if "items" in payload:
-            for item in record.items:
-                self.session.delete(item)
-            record.items = [OrderItemModel(**item) for item in payload.pop("items")]
-        for key, value in payload.items():
-            setattr(record, key, value)
-        return Order(**record.dict())
-
-    def delete(self, id_):
-        self.session.delete(self._get(id_))
+    def list_versions(self, limit=None, cursor=None, **filters):
+        """
+        Same listing as `list`, but only fetches the columns needed to build
+        the validators of the page.
+        """
+        query = self.session.query(*VERSION_COLUMNS)
+        return listing(query, limit, cursor, filters).all()
+
+    def export(self, batch_size=1000, **filters):
+        """
+        Yields the orders matching `filters` in listing order, keeping no
+        more than `batch_size` rows in memory at once.
+        """
+        rows = self.session.execute(export_statement(filters, batch_size))
+        for _, order_rows in groupby(rows, key=attrgetter("id")):
+            yield order_from_export_rows(list(order_rows))
+
+    def update(
+        self, id_, user_id=None, expected_version=None, expected_status=None, **payload
+    ):
+        """
+        Applies `payload` to the order with one UPDATE that also checks who
+        owns the order (when `user_id` is given), its version (when
+        `expected_version` is given) and its status (when `expected_status`
+        is given), and bumps the version. Returns None if the order doesn't
+        exist or doesn't belong to `user_id`, and raises
+        `OrderVersionConflictError` if its version isn't `expected_version`
+        or `OrderStatusConflictError` if its status isn't `expected_status`.
+        The items in `payload`, if any, are replaced with a bulk DELETE and
+        a bulk INSERT.
+        """
+        items = payload.pop("items", None)
+        statement = update_statement(
+            id_, user_id, expected_version, payload, expected_status
+        )
+        if supports_returning(self.session):
+            row = self.session.execute(statement.returning(*ORDER_COLUMNS)).first()
+        elif self.session.execute(statement).rowcount > 0:
+            row = self.session.execute(
+                select(*ORDER_COLUMNS).where(OrderModel.id == str(id_))
+            ).first()
+        else:
+            row = None
+        if row is None:
+            guarded = expected_version is not None or expected_status is not None
+            if guarded and self._exists(id_, user_id):
+                raise conflict_error(id_, expected_version, expected_status)
+            return None
+        invalidate_on_commit(self.session, self.cache, row.user_id, row.id)
+        if items is None:
+            items = [
+                OrderItem.from_row(item)
+                for item in self.session.execute(
+                    select(*ITEM_COLUMNS).where(OrderItemModel.order_id == row.id)
+                )
+            ]
+        else:
+            item_rows = replacement_item_rows(row.id, items)
+            self.session.execute(
+                delete(OrderItemModel.__table__).where(
+                    OrderItemModel.order_id == row.id
+                )
+            )
+            self.session.execute(insert(OrderItemModel.__table__), item_rows)
+            items = [
+                OrderItem(item["id"], item["product"], item["quantity"], item["size"])
+                for item in item_rows
+            ]
+        return order_from_columns(row, items)
+
+    def _exists(self, id_, user_id):
+        statement = owned_by(select(OrderModel.id), id_, user_id)
+        return self.session.execute(statement).first() is not None
+
+    def delete(self, id_, user_id):
+        """
+        Deletes the order if it belongs to `user_id`. Returns whether an
+        order was deleted.
+        """
+        delete_items, delete_order = delete_statements(id_, user_id)
+        self.session.execute(delete_items)
+        if self.session.execute(delete_order).rowcount == 0:
+            return False
+        invalidate_on_commit(self.session, self.cache, user_id, id_)
+        return True
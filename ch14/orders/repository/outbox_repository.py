@@ -0,0 +1,108 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, or_, select, update
+
+from orders.repository.models import OutboxMessageModel
+
+
+class OutboxRepository:
+    """
+    Stores the messages that must be delivered to other services once the
+    transaction that produced them commits. Messages are written in the same
+    unit of work as the order changes they describe, and a dispatcher
+    delivers them afterwards.
+    """
+
+    def __init__(self, session):
+        self.session = session
+
+    def add(self, order_id, event_type, payload):
+        record = OutboxMessageModel(
+            order_id=order_id, event_type=event_type, payload=payload
+        )
+        self.session.add(record)
+        return record
+
+    def claim(self, batch_size, lease, max_attempts=None):
+        """
+        Claims the oldest undispatched messages for `lease` seconds, skipping
+        the messages claimed by other dispatchers. Commit the claim before
+        delivering the messages, so that no row stays locked while the other
+        services respond; if the dispatcher dies, its messages are claimed
+        again once the lease runs out. The messages are returned as rows, so
+        they can be read after the session is closed.
+        """
+        now = datetime.utcnow()
+        query = select(OutboxMessageModel.__table__).filter(
+            OutboxMessageModel.dispatched.is_(None),
+            or_(
+                OutboxMessageModel.claimed_until.is_(None),
+                OutboxMessageModel.claimed_until < now,
+            ),
+        )
+        if max_attempts is not None:
+            query = query.filter(OutboxMessageModel.attempts < max_attempts)
+        # On Postgres, rows being claimed by other dispatchers are skipped
+        query = (
+            query.order_by(OutboxMessageModel.created)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        messages = self.session.execute(query).all()
+        if messages:
+            self._set(
+                [message.id for message in messages],
+                claimed_until=now + timedelta(seconds=lease),
+            )
+        return messages
+
+    def release(self, message_ids):
+        """Gives claimed messages back to be delivered by the next batch."""
+        if message_ids:
+            self._set(message_ids, claimed_until=None)
+
+    def mark_dispatched(self, message_id):
+        self._set(
+            [message_id],
+            dispatched=datetime.utcnow(),
+            attempts=OutboxMessageModel.attempts + 1,
+            last_error=None,
+            claimed_until=None,
+        )
+
+    def mark_failed(self, message_id, error):
+        self._set(
+            [message_id],
+            attempts=OutboxMessageModel.attempts + 1,
+            last_error=str(error),
+            claimed_until=None,
+        )
+
+    def _set(self, message_ids, **values):
+        self.session.execute(
+            update(OutboxMessageModel)
+            .where(OutboxMessageModel.id.in_(message_ids))
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+
+    def discard(self, order_id, event_type):
+        """
+        Deletes the undispatched messages of an order, returning how many
+        were deleted.
+        """
+        return self.session.execute(discard_statement(order_id, event_type)).rowcount
+
+
+def discard_statement(order_id, event_type):
+    return delete(OutboxMessageModel).where(
+        OutboxMessageModel.order_id == str(order_id),
+        OutboxMessageModel.event_type == event_type,
+        OutboxMessageModel.dispatched.is_(None),
+    )
+
+
+class AsyncOutboxRepository(OutboxRepository):
+    async def discard(self, order_id, event_type):
+        result = await self.session.execute(discard_statement(order_id, event_type))
+        return result.rowcount
@@ -1,17 +1,84 @@
 import os
 
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker
 
+from orders.repository.cache import discard_after_commit_hooks, run_after_commit_hooks
+
 
 DB_URL = os.getenv('DB_URL')
 
 assert DB_URL is not None, 'DB_URL environment variable needed.'
 
 
+def pool_options():
+    """
+    Connection pool settings for the shared engine, read from the environment.
+    SQLite doesn't use a queue pool, so no pool sizing is applied to it.
+    """
+    if make_url(DB_URL).get_backend_name() == 'sqlite':
+        return {}
+    return {
+        'pool_size': int(os.getenv('DB_POOL_SIZE', '5')),
+        'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', '10')),
+        'pool_timeout': float(os.getenv('DB_POOL_TIMEOUT', '30')),
+        'pool_recycle': int(os.getenv('DB_POOL_RECYCLE', '1800')),
+        'pool_pre_ping': os.getenv('DB_POOL_PRE_PING', 'True') == 'True',
+    }
+
+
+engine = None
+session_maker = None
+
+
+def init_engine():
+    """
+    Creates the process-wide engine and session factory. Called once at
+    application startup; calling it again is a no-op.
+    """
+    global engine, session_maker
+    if engine is None:
+        engine = create_engine(DB_URL, **pool_options())
+        session_maker = sessionmaker(bind=engine)
+    return engine
+
+
+def dispose_engine():
+    """
+    Closes all pooled connections. Called at application shutdown.
+    """
+    global engine, session_maker
+    if engine is not None:
+        engine.dispose()
+    engine = None
+    session_maker = None
+
+
+def pool_stats(engine_=None):
+    """
+    Returns a snapshot of the connection pool usage for the shared engine.
+    """
+    engine_ = engine_ or engine
+    if engine_ is None:
+        return {'initialized': False}
+    pool = engine_.pool
+    stats = {
+        'initialized': True,
+        'pool_class': type(pool).__name__,
+        'status': pool.status(),
+    }
+    for name in ('size', 'checkedin', 'checkedout', 'overflow'):
+        method = getattr(pool, name, None)
+        if callable(method):
+            stats[name] = method()
+    return stats
+
+
 class UnitOfWork:
     def __init__(self):
-        self.session_maker = sessionmaker(bind=create_engine(DB_URL))
+        init_engine()
+        self.session_maker = session_maker
 
     def __enter__(self):
         self.session = self.session_maker()
@@ -25,6 +92,8 @@ class UnitOfWork:
 
     def commit(self):
         self.session.commit()
+        run_after_commit_hooks(self.session)
 
     def rollback(self):
         self.session.rollback()
+        discard_after_commit_hooks(self.session)
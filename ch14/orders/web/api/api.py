@@ -1,30 +1,116 @@
-from typing import Optional
+from typing import List, Optional
 from uuid import UUID
 
-from fastapi import HTTPException
+from fastapi import Body, HTTPException, Query
 from starlette import status
 from starlette.requests import Request
-from starlette.responses import Response
+from starlette.responses import Response, StreamingResponse
 
-from orders.orders_service.exceptions import OrderNotFoundError
+from orders.orders_service.exceptions import (
+    APIIntegrationError,
+    DependencyUnavailableError,
+    OrderNotFoundError,
+    OrderStatusConflictError,
+    OrderVersionConflictError,
+)
 from orders.orders_service.orders_service import OrdersService
 from orders.repository.orders_repository import OrdersRepository
+from orders.repository.outbox_repository import OutboxRepository
 from orders.repository.unit_of_work import UnitOfWork
 from orders.web.app import app
-from orders.web.api.schemas import GetOrderSchema, CreateOrderSchema, GetOrdersSchema
+from orders.web.api.batch import batch_report, batch_status_code, validate_batch
+from orders.web.api.export import (
+    EXPORT_BATCH_SIZE,
+    MEDIA_TYPES,
+    export_chunks,
+)
+from orders.web.api.conditional import (
+    if_match_version,
+    is_conditional,
+    is_conditional_listing,
+    listing_validators,
+    not_modified,
+    not_modified_response,
+    order_validators,
+)
+from orders.web.api.pagination import decode_cursor, paginate
+from orders.web.api.responses import respond
+from orders.web.api.schemas import (
+    GetOrderSchema,
+    CreateOrderSchema,
+    ExportFormat,
+    GetOrdersSchema,
+    BatchOrdersResultSchema,
+    MAX_BATCH_SIZE,
+)
 
 
 @app.get("/orders", response_model=GetOrdersSchema)
 def get_orders(
-    request: Request, cancelled: Optional[bool] = None, limit: Optional[int] = None
+    request: Request,
+    response: Response,
+    cancelled: Optional[bool] = None,
+    limit: Optional[int] = Query(None, ge=1),
+    cursor: Optional[str] = None,
 ):
+    try:
+        position = decode_cursor(cursor) if cursor is not None else None
+    except ValueError as error:
+        raise HTTPException(status_code=400, detail=str(error))
+    filters = {
+        "limit": limit + 1 if limit is not None else None,
+        "cursor": position,
+        "cancelled": cancelled,
+        "user_id": request.state.user_id,
+    }
     with UnitOfWork() as unit_of_work:
         repo = OrdersRepository(unit_of_work.session)
         orders_service = OrdersService(repo)
-        results = orders_service.list_orders(
-            limit=limit, cancelled=cancelled, user_id=request.state.user_id
-        )
-    return {"orders": [result.dict() for result in results]}
+        if is_conditional_listing(request):
+            # Checked against the versions of the page, without loading items
+            versions = orders_service.list_order_versions(**filters)
+            validators = listing_validators(*paginate(versions, limit))
+            if not_modified(request, validators):
+                return not_modified_response(validators)
+        results = orders_service.list_orders(**filters)
+    results, next_cursor = paginate(results, limit)
+    response.headers.update(listing_validators(results, next_cursor))
+    return respond(
+        {
+            "orders": [result.dict() for result in results],
+            "next_cursor": next_cursor,
+        },
+        response=response,
+    )
+
+
+def export_orders(filters):
+    """
+    Keeps the unit of work open while the response is streamed, and closes
+    it when the body is complete or the client goes away.
+    """
+    with UnitOfWork() as unit_of_work:
+        repo = OrdersRepository(unit_of_work.session)
+        orders_service = OrdersService(repo)
+        yield from orders_service.export_orders(batch_size=EXPORT_BATCH_SIZE, **filters)
+
+
+# Registered before /orders/{order_id}, which would otherwise match it
+@app.get("/orders/export", response_class=StreamingResponse)
+def get_orders_export(
+    request: Request,
+    format: ExportFormat = ExportFormat.ndjson,
+    cancelled: Optional[bool] = None,
+):
+    """
+    Streams the user's orders as NDJSON, one order per line, or as CSV, one
+    order item per line, in constant memory.
+    """
+    filters = {"cancelled": cancelled, "user_id": request.state.user_id}
+    return StreamingResponse(
+        export_chunks(export_orders(filters), format.value),
+        media_type=MEDIA_TYPES[format.value],
+    )
 
 
 @app.post("/orders", status_code=status.HTTP_201_CREATED, response_model=GetOrderSchema)
@@ -38,19 +124,50 @@ def create_order(request: Request, payload: CreateOrderSchema):
         order = orders_service.place_order(order, request.state.user_id)
         unit_of_work.commit()
         return_payload = order.dict()
-    return return_payload
+    return respond(return_payload, status_code=status.HTTP_201_CREATED)
+
+
+@app.post(
+    "/orders/batch",
+    status_code=status.HTTP_201_CREATED,
+    response_model=BatchOrdersResultSchema,
+    response_model_exclude_none=True,
+)
+def create_orders(
+    request: Request,
+    response: Response,
+    payload: List[dict] = Body(..., min_items=1, max_items=MAX_BATCH_SIZE),
+):
+    indexes, orders, failures = validate_batch(payload)
+    if orders:
+        with UnitOfWork() as unit_of_work:
+            repo = OrdersRepository(unit_of_work.session)
+            orders_service = OrdersService(repo)
+            orders = orders_service.place_orders(orders, request.state.user_id)
+            unit_of_work.commit()
+    report = batch_report(indexes, orders, failures)
+    response.status_code = batch_status_code(report)
+    return respond(report, status_code=response.status_code)
 
 
 @app.get("/orders/{order_id}", response_model=GetOrderSchema)
-def get_order(request: Request, order_id: UUID):
+def get_order(request: Request, response: Response, order_id: UUID):
     try:
         with UnitOfWork() as unit_of_work:
             repo = OrdersRepository(unit_of_work.session)
             orders_service = OrdersService(repo)
+            if is_conditional(request):
+                version = orders_service.get_order_version(
+                    order_id=order_id, user_id=request.state.user_id
+                )
+                validators = order_validators(version)
+                if not_modified(request, validators, version.updated):
+                    return not_modified_response(validators)
             order = orders_service.get_order(
                 order_id=order_id, user_id=request.state.user_id
             )
-        return order.dict()
+        response.headers.update(order_validators(order))
+        return respond(order.dict(), response=response)
     except OrderNotFoundError:
         raise HTTPException(
             status_code=404, detail=f"Order with ID {order_id} not found"
@@ -58,7 +175,16 @@ def get_order(request: Request, order_id: UUID):
 
 
 @app.put("/orders/{order_id}", response_model=GetOrderSchema)
-def update_order(request: Request, order_id: UUID, order_details: CreateOrderSchema):
+def update_order(
+    request: Request,
+    response: Response,
+    order_id: UUID,
+    order_details: CreateOrderSchema,
+):
+    try:
+        expected_version = if_match_version(request)
+    except ValueError as error:
+        raise HTTPException(status_code=412, detail=str(error))
     try:
         with UnitOfWork() as unit_of_work:
             repo = OrdersRepository(unit_of_work.session)
@@ -67,14 +193,24 @@ def update_order(request: Request, order_id: UUID, order_details: CreateOrderSch
             for item in order:
                 item["size"] = item["size"].value
             order = orders_service.update_order(
-                order_id=order_id, items=order, user_id=request.state.user_id
+                order_id=order_id,
+                items=order,
+                user_id=request.state.user_id,
+                expected_version=expected_version,
             )
             unit_of_work.commit()
-        return order.dict()
+        response.headers.update(order_validators(order))
+        return respond(order.dict(), response=response)
     except OrderNotFoundError:
         raise HTTPException(
             status_code=404, detail=f"Order with ID {order_id} not found"
         )
+    except OrderVersionConflictError as error:
+        # Only raised when If-Match was sent, in which case the client's
+        # version is stale
+        if expected_version is not None:
+            raise HTTPException(status_code=412, detail=str(error))
+        raise HTTPException(status_code=409, detail=str(error))
 
 
 @app.delete(
@@ -102,13 +238,32 @@ def cancel_order(request: Request, order_id: UUID):
         with UnitOfWork() as unit_of_work:
             repo = OrdersRepository(unit_of_work.session)
             orders_service = OrdersService(repo)
-            order = orders_service.cancel_order(order_id=order_id, user_id=request.state.user_id)
+            order = orders_service.get_order(
+                order_id=order_id, user_id=request.state.user_id
+            )
+        # The kitchen API is called with no database connection checked out
+        orders_service.process_cancellation(order)
+        with UnitOfWork() as unit_of_work:
+            repo = OrdersRepository(unit_of_work.session)
+            outbox = OutboxRepository(unit_of_work.session)
+            orders_service = OrdersService(repo, outbox)
+            order = orders_service.cancel_order(
+                order_id=order_id,
+                user_id=request.state.user_id,
+                expected_status=order.status,
+            )
             unit_of_work.commit()
-        return order.dict()
+        return respond(order.dict())
     except OrderNotFoundError:
         raise HTTPException(
             status_code=404, detail=f"Order with ID {order_id} not found"
         )
+    except OrderStatusConflictError as error:
+        raise HTTPException(status_code=409, detail=str(error))
+    except DependencyUnavailableError as error:
+        raise HTTPException(status_code=503, detail=str(error))
+    except APIIntegrationError as error:
+        raise HTTPException(status_code=502, detail=str(error))
 
 
 @app.post("/orders/{order_id}/pay", response_model=GetOrderSchema)
@@ -117,10 +272,27 @@ def pay_order(request: Request, order_id: UUID):
         with UnitOfWork() as unit_of_work:
             repo = OrdersRepository(unit_of_work.session)
             orders_service = OrdersService(repo)
-            order = orders_service.pay_order(order_id=order_id, user_id=request.state.user_id)
+            order = orders_service.get_order(
+                order_id=order_id, user_id=request.state.user_id
+            )
+        # The payments API is called with no database connection checked out
+        orders_service.process_payment(order)
+        with UnitOfWork() as unit_of_work:
+            repo = OrdersRepository(unit_of_work.session)
+            outbox = OutboxRepository(unit_of_work.session)
+            orders_service = OrdersService(repo, outbox)
+            order = orders_service.pay_order(
+                order_id=order_id, user_id=request.state.user_id
+            )
             unit_of_work.commit()
-        return order.dict()
+        return respond(order.dict())
     except OrderNotFoundError:
         raise HTTPException(
             status_code=404, detail=f"Order with ID {order_id} not found"
         )
+    except OrderStatusConflictError as error:
+        raise HTTPException(status_code=409, detail=str(error))
+    except DependencyUnavailableError as error:
+        raise HTTPException(status_code=503, detail=str(error))
+    except APIIntegrationError as error:
+        raise HTTPException(status_code=502, detail=str(error))
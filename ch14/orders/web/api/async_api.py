@@ -0,0 +1,292 @@
+from typing import List, Optional
+from uuid import UUID
+
+from fastapi import Body, HTTPException, Query
+from starlette import status
+from starlette.requests import Request
+from starlette.responses import Response, StreamingResponse
+
+from orders.orders_service.async_orders_service import AsyncOrdersService
+from orders.orders_service.exceptions import (
+    APIIntegrationError,
+    DependencyUnavailableError,
+    OrderNotFoundError,
+    OrderStatusConflictError,
+    OrderVersionConflictError,
+)
+from orders.repository.async_orders_repository import AsyncOrdersRepository
+from orders.repository.outbox_repository import AsyncOutboxRepository
+from orders.repository.async_unit_of_work import AsyncUnitOfWork
+from orders.web.app import app
+from orders.web.api.batch import batch_report, batch_status_code, validate_batch
+from orders.web.api.export import (
+    EXPORT_BATCH_SIZE,
+    MEDIA_TYPES,
+    async_export_chunks,
+)
+from orders.web.api.conditional import (
+    if_match_version,
+    is_conditional,
+    is_conditional_listing,
+    listing_validators,
+    not_modified,
+    not_modified_response,
+    order_validators,
+)
+from orders.web.api.pagination import decode_cursor, paginate
+from orders.web.api.responses import respond
+from orders.web.api.schemas import (
+    GetOrderSchema,
+    CreateOrderSchema,
+    ExportFormat,
+    GetOrdersSchema,
+    BatchOrdersResultSchema,
+    MAX_BATCH_SIZE,
+)
+
+
+@app.get("/orders", response_model=GetOrdersSchema)
+async def get_orders(
+    request: Request,
+    response: Response,
+    cancelled: Optional[bool] = None,
+    limit: Optional[int] = Query(None, ge=1),
+    cursor: Optional[str] = None,
+):
+    try:
+        position = decode_cursor(cursor) if cursor is not None else None
+    except ValueError as error:
+        raise HTTPException(status_code=400, detail=str(error))
+    filters = {
+        "limit": limit + 1 if limit is not None else None,
+        "cursor": position,
+        "cancelled": cancelled,
+        "user_id": request.state.user_id,
+    }
+    async with AsyncUnitOfWork() as unit_of_work:
+        repo = AsyncOrdersRepository(unit_of_work.session)
+        orders_service = AsyncOrdersService(repo)
+        if is_conditional_listing(request):
+            # Checked against the versions of the page, without loading items
+            versions = await orders_service.list_order_versions(**filters)
+            validators = listing_validators(*paginate(versions, limit))
+            if not_modified(request, validators):
+                return not_modified_response(validators)
+        results = await orders_service.list_orders(**filters)
+    results, next_cursor = paginate(results, limit)
+    response.headers.update(listing_validators(results, next_cursor))
+    return respond(
+        {
+            "orders": [result.dict() for result in results],
+            "next_cursor": next_cursor,
+        },
+        response=response,
+    )
+
+
+async def export_orders(filters):
+    async with AsyncUnitOfWork() as unit_of_work:
+        repo = AsyncOrdersRepository(unit_of_work.session)
+        orders_service = AsyncOrdersService(repo)
+        async for order in orders_service.export_orders(
+            batch_size=EXPORT_BATCH_SIZE, **filters
+        ):
+            yield order
+
+
+@app.get("/orders/export", response_class=StreamingResponse)
+async def get_orders_export(
+    request: Request,
+    format: ExportFormat = ExportFormat.ndjson,
+    cancelled: Optional[bool] = None,
+):
+    filters = {"cancelled": cancelled, "user_id": request.state.user_id}
+    return StreamingResponse(
+        async_export_chunks(export_orders(filters), format.value),
+        media_type=MEDIA_TYPES[format.value],
+    )
+
+
+@app.post("/orders", status_code=status.HTTP_201_CREATED, response_model=GetOrderSchema)
+async def create_order(request: Request, payload: CreateOrderSchema):
+    async with AsyncUnitOfWork() as unit_of_work:
+        repo = AsyncOrdersRepository(unit_of_work.session)
+        orders_service = AsyncOrdersService(repo)
+        order = payload.dict()["order"]
+        for item in order:
+            item["size"] = item["size"].value
+        order = await orders_service.place_order(order, request.state.user_id)
+        await unit_of_work.commit()
+        return_payload = order.dict()
+    return respond(return_payload, status_code=status.HTTP_201_CREATED)
+
+
+@app.post(
+    "/orders/batch",
+    status_code=status.HTTP_201_CREATED,
+    response_model=BatchOrdersResultSchema,
+    response_model_exclude_none=True,
+)
+async def create_orders(
+    request: Request,
+    response: Response,
+    payload: List[dict] = Body(..., min_items=1, max_items=MAX_BATCH_SIZE),
+):
+    indexes, orders, failures = validate_batch(payload)
+    if orders:
+        async with AsyncUnitOfWork() as unit_of_work:
+            repo = AsyncOrdersRepository(unit_of_work.session)
+            orders_service = AsyncOrdersService(repo)
+            orders = await orders_service.place_orders(orders, request.state.user_id)
+            await unit_of_work.commit()
+    report = batch_report(indexes, orders, failures)
+    response.status_code = batch_status_code(report)
+    return respond(report, status_code=response.status_code)
+
+
+@app.get("/orders/{order_id}", response_model=GetOrderSchema)
+async def get_order(request: Request, response: Response, order_id: UUID):
+    try:
+        async with AsyncUnitOfWork() as unit_of_work:
+            repo = AsyncOrdersRepository(unit_of_work.session)
+            orders_service = AsyncOrdersService(repo)
+            if is_conditional(request):
+                version = await orders_service.get_order_version(
+                    order_id=order_id, user_id=request.state.user_id
+                )
+                validators = order_validators(version)
+                if not_modified(request, validators, version.updated):
+                    return not_modified_response(validators)
+            order = await orders_service.get_order(
+                order_id=order_id, user_id=request.state.user_id
+            )
+        response.headers.update(order_validators(order))
+        return respond(order.dict(), response=response)
+    except OrderNotFoundError:
+        raise HTTPException(
+            status_code=404, detail=f"Order with ID {order_id} not found"
+        )
+
+
+@app.put("/orders/{order_id}", response_model=GetOrderSchema)
+async def update_order(
+    request: Request,
+    response: Response,
+    order_id: UUID,
+    order_details: CreateOrderSchema,
+):
+    try:
+        expected_version = if_match_version(request)
+    except ValueError as error:
+        raise HTTPException(status_code=412, detail=str(error))
+    try:
+        async with AsyncUnitOfWork() as unit_of_work:
+            repo = AsyncOrdersRepository(unit_of_work.session)
+            orders_service = AsyncOrdersService(repo)
+            order = order_details.dict()["order"]
+            for item in order:
+                item["size"] = item["size"].value
+            order = await orders_service.update_order(
+                order_id=order_id,
+                items=order,
+                user_id=request.state.user_id,
+                expected_version=expected_version,
+            )
+            await unit_of_work.commit()
+        response.headers.update(order_validators(order))
+        return respond(order.dict(), response=response)
+    except OrderNotFoundError:
+        raise HTTPException(
+            status_code=404, detail=f"Order with ID {order_id} not found"
+        )
+    except OrderVersionConflictError as error:
+        # Only raised when If-Match was sent, in which case the client's
+        # version is stale
+        if expected_version is not None:
+            raise HTTPException(status_code=412, detail=str(error))
+        raise HTTPException(status_code=409, detail=str(error))
+
+
+@app.delete(
+    "/orders/{order_id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    response_class=Response,
+)
+async def delete_order(request: Request, order_id: UUID):
+    try:
+        async with AsyncUnitOfWork() as unit_of_work:
+            repo = AsyncOrdersRepository(unit_of_work.session)
+            orders_service = AsyncOrdersService(repo)
+            await orders_service.delete_order(
+                order_id=order_id, user_id=request.state.user_id
+            )
+            await unit_of_work.commit()
+        return
+    except OrderNotFoundError:
+        raise HTTPException(
+            status_code=404, detail=f"Order with ID {order_id} not found"
+        )
+
+
+@app.post("/orders/{order_id}/cancel", response_model=GetOrderSchema)
+async def cancel_order(request: Request, order_id: UUID):
+    try:
+        async with AsyncUnitOfWork() as unit_of_work:
+            repo = AsyncOrdersRepository(unit_of_work.session)
+            orders_service = AsyncOrdersService(repo)
+            order = await orders_service.get_order(
+                order_id=order_id, user_id=request.state.user_id
+            )
+        await orders_service.process_cancellation(order)
+        async with AsyncUnitOfWork() as unit_of_work:
+            repo = AsyncOrdersRepository(unit_of_work.session)
+            outbox = AsyncOutboxRepository(unit_of_work.session)
+            orders_service = AsyncOrdersService(repo, outbox)
+            order = await orders_service.cancel_order(
+                order_id=order_id,
+                user_id=request.state.user_id,
+                expected_status=order.status,
+            )
+            await unit_of_work.commit()
+        return respond(order.dict())
+    except OrderNotFoundError:
+        raise HTTPException(
+            status_code=404, detail=f"Order with ID {order_id} not found"
+        )
+    except OrderStatusConflictError as error:
+        raise HTTPException(status_code=409, detail=str(error))
+    except DependencyUnavailableError as error:
+        raise HTTPException(status_code=503, detail=str(error))
+    except APIIntegrationError as error:
+        raise HTTPException(status_code=502, detail=str(error))
+
+
+@app.post("/orders/{order_id}/pay", response_model=GetOrderSchema)
+async def pay_order(request: Request, order_id: UUID):
+    try:
+        async with AsyncUnitOfWork() as unit_of_work:
+            repo = AsyncOrdersRepository(unit_of_work.session)
+            orders_service = AsyncOrdersService(repo)
+            order = await orders_service.get_order(
+                order_id=order_id, user_id=request.state.user_id
+            )
+        await orders_service.process_payment(order)
+        async with AsyncUnitOfWork() as unit_of_work:
+            repo = AsyncOrdersRepository(unit_of_work.session)
+            outbox = AsyncOutboxRepository(unit_of_work.session)
+            orders_service = AsyncOrdersService(repo, outbox)
+            order = await orders_service.pay_order(
+                order_id=order_id, user_id=request.state.user_id
+            )
+            await unit_of_work.commit()
+        return respond(order.dict())
+    except OrderNotFoundError:
+        raise HTTPException(
+            status_code=404, detail=f"Order with ID {order_id} not found"
+        )
+    except OrderStatusConflictError as error:
+        raise HTTPException(status_code=409, detail=str(error))
+    except DependencyUnavailableError as error:
+        raise HTTPException(status_code=503, detail=str(error))
+    except APIIntegrationError as error:
+        raise HTTPException(status_code=502, detail=str(error))
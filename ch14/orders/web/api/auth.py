@@ -1,3 +1,8 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
 from pathlib import Path
 
 import jwt
@@ -8,13 +13,79 @@ public_key_text = (Path(__file__).parent / "../../../public_key.pem").read_text(
 public_key = load_pem_x509_certificate(public_key_text.encode()).public_key()
 
 
-def decode_and_validate_token(access_token):
+class TokenCache:
     """
-    Validates an access token. If the token is valid, it returns the token payload.
+    Bounded LRU cache of validated token payloads. Entries are keyed by the
+    SHA-256 digest of the token, so raw tokens aren't kept in memory, and
+    they expire after `ttl` seconds or when the token itself expires,
+    whichever comes first.
     """
+
+    def __init__(self, maxsize=10_000, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(token):
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token):
+        key = self._key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, payload = entry
+            if expires <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return payload
+
+    def set(self, token, payload):
+        expires = time.time() + self.ttl
+        if "exp" in payload:
+            expires = min(expires, payload["exp"])
+        key = self._key(token)
+        with self._lock:
+            self._entries[key] = (expires, payload)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# AUTH_CACHE_SIZE=0 disables the cache
+token_cache = TokenCache(
+    maxsize=int(os.getenv("AUTH_CACHE_SIZE", "10000")),
+    ttl=float(os.getenv("AUTH_CACHE_TTL", "300")),
+)
+
+
+def _decode_and_validate_token(access_token):
     return jwt.decode(
         access_token,
         key=public_key,
         algorithms=["RS256"],
         audience=["http://127.0.0.1:8000/orders"],
     )
+
+
+def decode_and_validate_token(access_token):
+    """
+    Validates an access token. If the token is valid, it returns the token payload.
+    Tokens that were validated recently are served from `token_cache`, which
+    skips the RS256 signature verification.
+    """
+    if token_cache.maxsize <= 0:
+        return _decode_and_validate_token(access_token)
+    payload = token_cache.get(access_token)
+    if payload is None:
+        payload = _decode_and_validate_token(access_token)
+        token_cache.set(access_token, payload)
+    return payload
@@ -0,0 +1,42 @@
+from pydantic import ValidationError
+
+from orders.web.api.schemas import CreateOrderSchema
+
+
+def validate_batch(payload):
+    """
+    Validates every order of a batch on its own, so that invalid orders can
+    be reported without rejecting the valid ones. Returns the indexes and
+    items of the valid orders, and the results of the invalid ones.
+    """
+    indexes, orders, failures = [], [], []
+    for index, order in enumerate(payload):
+        try:
+            order = CreateOrderSchema.parse_obj(order).dict()["order"]
+        except ValidationError as error:
+            failures.append(
+                {"index": index, "status": "failed", "errors": error.errors()}
+            )
+            continue
+        for item in order:
+            item["size"] = item["size"].value
+        indexes.append(index)
+        orders.append(order)
+    return indexes, orders, failures
+
+
+def batch_report(indexes, orders, failures):
+    results = [
+        {"index": index, "status": "created", "order": order.dict()}
+        for index, order in zip(indexes, orders)
+    ]
+    results = sorted(results + failures, key=lambda result: result["index"])
+    return {"created": len(orders), "failed": len(failures), "results": results}
+
+
+def batch_status_code(report):
+    if report["failed"] == 0:
+        return 201
+    if report["created"] == 0:
+        return 422
+    return 207
@@ -0,0 +1,97 @@
+import hashlib
+from datetime import timezone
+from email.utils import format_datetime, parsedate_to_datetime
+
+from starlette import status
+from starlette.responses import Response
+
+
+def etag_matches(if_none_match, etag):
+    """Weak comparison of `etag` against an If-None-Match header."""
+    if if_none_match.strip() == "*":
+        return True
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return etag.removeprefix("W/") in tags
+
+
+def http_date(moment):
+    """Formats a naive UTC datetime as an HTTP date."""
+    return format_datetime(
+        moment.replace(tzinfo=timezone.utc, microsecond=0), usegmt=True
+    )
+
+
+def order_validators(order):
+    """
+    ETag and Last-Modified headers of an order. `order` is anything with
+    `version` and `updated` attributes, such as an `Order` or the row
+    returned by `OrdersRepository.get_version`.
+    """
+    return {"ETag": f'"{order.version}"', "Last-Modified": http_date(order.updated)}
+
+
+def listing_validators(orders, next_cursor):
+    """
+    ETag header of a page of orders. The ETag changes when an order of the
+    page changes, or when orders are added to or removed from the page.
+    Listings have no Last-Modified: the most recent change among the orders
+    left on a page doesn't move when an older order is deleted, and dates
+    can't tell apart two changes within the same second.
+    """
+    digest = hashlib.sha256()
+    for order in orders:
+        digest.update(f"{order.id}:{order.version};".encode())
+    digest.update((next_cursor or "").encode())
+    return {"ETag": f'"{digest.hexdigest()[:32]}"'}
+
+
+def is_conditional(request):
+    return "If-None-Match" in request.headers or "If-Modified-Since" in request.headers
+
+
+def is_conditional_listing(request):
+    # Listings are only validated by their ETag, see listing_validators()
+    return "If-None-Match" in request.headers
+
+
+def not_modified(request, validators, updated=None):
+    """
+    Evaluates If-None-Match, or If-Modified-Since when there's no
+    If-None-Match, against the validators of the current representation.
+    If-Modified-Since is compared with `updated`, the naive UTC time of the
+    last change, and ignored without it. Last-Modified drops the fraction of
+    a second, so comparing with it would hide a second change made within
+    the same second as the one the client saw.
+    """
+    if_none_match = request.headers.get("If-None-Match")
+    if if_none_match is not None:
+        return etag_matches(if_none_match, validators["ETag"])
+    if_modified_since = request.headers.get("If-Modified-Since")
+    if if_modified_since is None or updated is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        return False
+    return updated.replace(tzinfo=timezone.utc) <= since
+
+
+def if_match_version(request):
+    """
+    Returns the order version required by the If-Match header, or None if
+    there's no header or it's "*". Raises `ValueError` unless the header is
+    "*" or a single strong ETag.
+    """
+    if_match = request.headers.get("If-Match")
+    if if_match is None or if_match.strip() == "*":
+        return None
+    etag = if_match.strip()
+    if not (len(etag) > 2 and etag[0] == etag[-1] == '"' and etag[1:-1].isdigit()):
+        raise ValueError(f"If-Match doesn't identify a version of the order: {etag}")
+    return int(etag[1:-1])
+
+
+def not_modified_response(validators):
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=validators)
@@ -0,0 +1,77 @@
+import csv
+import io
+import os
+
+import orjson
+
+
+# Rows fetched from the database per round trip, and orders encoded per chunk
+# of the response body.
+EXPORT_BATCH_SIZE = int(os.getenv("ORDERS_EXPORT_BATCH_SIZE", "1000"))
+EXPORT_CHUNK_SIZE = int(os.getenv("ORDERS_EXPORT_CHUNK_SIZE", "100"))
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+CSV_FIELDS = ("order_id", "created", "status", "product", "size", "quantity")
+
+
+def ndjson_lines(orders):
+    return b"".join(orjson.dumps(order.dict()) + b"\n" for order in orders)
+
+
+def csv_lines(orders):
+    """
+    One line per order item, with the order's fields repeated on each line.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for order in orders:
+        fields = (order.id, order.created.isoformat(), order.status)
+        for item in order.items:
+            writer.writerow((*fields, item.product, item.size, item.quantity))
+    return buffer.getvalue().encode()
+
+
+ENCODERS = {"ndjson": ndjson_lines, "csv": csv_lines}
+
+
+def header(export_format):
+    if export_format == "csv":
+        return (",".join(CSV_FIELDS) + "\r\n").encode()
+    return b""
+
+
+def export_chunks(orders, export_format, chunk_size=None):
+    """
+    Encodes the orders yielded by `orders` into body chunks of `chunk_size`
+    orders each (EXPORT_CHUNK_SIZE by default), so that only one chunk is
+    held in memory at a time.
+    """
+    chunk_size = chunk_size or EXPORT_CHUNK_SIZE
+    encode = ENCODERS[export_format]
+    yield header(export_format)
+    chunk = []
+    for order in orders:
+        chunk.append(order)
+        if len(chunk) == chunk_size:
+            yield encode(chunk)
+            chunk = []
+    if chunk:
+        yield encode(chunk)
+
+
+async def async_export_chunks(orders, export_format, chunk_size=None):
+    chunk_size = chunk_size or EXPORT_CHUNK_SIZE
+    encode = ENCODERS[export_format]
+    yield header(export_format)
+    chunk = []
+    async for order in orders:
+        chunk.append(order)
+        if len(chunk) == chunk_size:
+            yield encode(chunk)
+            chunk = []
+    if chunk:
+        yield encode(chunk)
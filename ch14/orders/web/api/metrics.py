@@ -0,0 +1,16 @@
+from orders.orders_service.resilience import dependency_stats
+from orders.repository.async_unit_of_work import async_pool_stats
+from orders.repository.unit_of_work import pool_stats
+from orders.web.app import app, API_MODE
+
+
+@app.get("/metrics/db-pool", include_in_schema=False)
+def get_db_pool_metrics():
+    if API_MODE == "async":
+        return async_pool_stats()
+    return pool_stats()
+
+
+@app.get("/metrics/dependencies", include_in_schema=False)
+def get_dependencies_metrics():
+    return dependency_stats()
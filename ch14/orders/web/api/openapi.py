@@ -0,0 +1,98 @@
+import gzip
+import hashlib
+import json
+
+from fastapi.openapi.docs import get_redoc_html, get_swagger_ui_html
+from starlette import status
+from starlette.requests import Request
+from starlette.responses import Response
+
+from orders.web.api.conditional import etag_matches
+from orders.web.app import app, oas_doc, OPENAPI_URL, DOCS_URL
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def accepted_encodings(accept_encoding):
+    """
+    Parses an Accept-Encoding header into the set of codings the client
+    accepts, leaving out those explicitly refused with q=0.
+    """
+    accepted = set()
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = params.strip()
+        if quality.startswith("q="):
+            try:
+                if float(quality[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(coding)
+    return accepted
+
+
+class PrecomputedDocument:
+    """
+    A JSON document rendered once into bytes, together with its gzip and
+    brotli encodings. Each encoding has its own strong ETag, since the bytes
+    on the wire differ.
+    """
+
+    preference = ("br", "gzip", "identity")
+
+    def __init__(self, document):
+        body = json.dumps(document, separators=(",", ":")).encode()
+        digest = hashlib.sha256(body).hexdigest()[:32]
+        self.representations = {"identity": (body, f'"{digest}"')}
+        self.representations["gzip"] = (
+            gzip.compress(body, compresslevel=9, mtime=0),
+            f'"{digest}-gzip"',
+        )
+        if brotli is not None:
+            self.representations["br"] = (brotli.compress(body), f'"{digest}-br"')
+
+    def response(self, request: Request):
+        accepted = accepted_encodings(request.headers.get("Accept-Encoding", ""))
+        encoding = next(
+            coding
+            for coding in self.preference
+            if coding in self.representations
+            and (coding in accepted or "*" in accepted or coding == "identity")
+        )
+        body, etag = self.representations[encoding]
+        headers = {
+            "ETag": etag,
+            "Vary": "Accept-Encoding",
+            "Cache-Control": "no-cache",
+        }
+        if_none_match = request.headers.get("If-None-Match")
+        if if_none_match is not None and etag_matches(if_none_match, etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        return Response(body, media_type="application/json", headers=headers)
+
+
+openapi_document = PrecomputedDocument(oas_doc)
+
+
+@app.get(OPENAPI_URL, include_in_schema=False)
+def get_openapi(request: Request):
+    return openapi_document.response(request)
+
+
+@app.get(DOCS_URL, include_in_schema=False)
+def get_docs():
+    return get_swagger_ui_html(openapi_url=OPENAPI_URL, title=oas_doc["info"]["title"])
+
+
+@app.get("/redoc", include_in_schema=False)
+def get_redoc():
+    return get_redoc_html(openapi_url=OPENAPI_URL, title=oas_doc["info"]["title"])
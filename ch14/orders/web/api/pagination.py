@@ -0,0 +1,35 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+
+
+def encode_cursor(order):
+    """
+    Builds an opaque cursor pointing right after `order` in the listing.
+    """
+    position = [order.created.isoformat(), order.id]
+    return base64.urlsafe_b64encode(json.dumps(position).encode()).decode()
+
+
+def decode_cursor(cursor):
+    """
+    Returns the `(created, id)` pair encoded in `cursor`. Raises `ValueError`
+    if the cursor is malformed.
+    """
+    try:
+        created, id_ = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(created), str(id_)
+    except (binascii.Error, TypeError, UnicodeDecodeError, ValueError):
+        raise ValueError(f"Invalid cursor: {cursor}")
+
+
+def paginate(orders, limit):
+    """
+    Splits a listing fetched with `limit + 1` rows into the page to return
+    and the cursor of the next page, if there's one.
+    """
+    if limit is None or len(orders) <= limit:
+        return orders, None
+    orders = orders[:limit]
+    return orders, encode_cursor(orders[-1])
@@ -1,6 +1,6 @@
 from datetime import datetime
 from enum import Enum
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 from uuid import UUID
 
 from pydantic import BaseModel, Extra, conint, conlist, validator
@@ -21,6 +21,11 @@ class Status(Enum):
     delivered = "delivered"
 
 
+class ExportFormat(Enum):
+    ndjson = "ndjson"
+    csv = "csv"
+
+
 class OrderItemSchema(BaseModel):
     product: str
     size: Size
@@ -50,6 +55,34 @@ class GetOrderSchema(CreateOrderSchema):
 
 class GetOrdersSchema(BaseModel):
     orders: List[GetOrderSchema]
+    next_cursor: Optional[str]
+
+    class Config:
+        extra = Extra.forbid
+
+
+MAX_BATCH_SIZE = 500
+
+
+class BatchResultStatus(Enum):
+    created = "created"
+    failed = "failed"
+
+
+class BatchOrderResultSchema(BaseModel):
+    index: int
+    status: BatchResultStatus
+    order: Optional[GetOrderSchema]
+    errors: Optional[List[Dict[str, Any]]]
+
+    class Config:
+        extra = Extra.forbid
+
+
+class BatchOrdersResultSchema(BaseModel):
+    created: int
+    failed: int
+    results: List[BatchOrderResultSchema]
 
     class Config:
         extra = Extra.forbid
@@ -14,42 +14,95 @@ from jwt import (
     MissingRequiredClaimError,
 )
 from starlette import status
-from starlette.middleware.base import RequestResponseEndpoint, BaseHTTPMiddleware
+from starlette.datastructures import Headers
 from starlette.middleware.cors import CORSMiddleware
-from starlette.requests import Request
-from starlette.responses import Response, JSONResponse
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
 
+from orders.orders_service.http_client import close_client
+from orders.repository.async_unit_of_work import (
+    dispose_async_engine,
+    init_async_engine,
+)
+from orders.repository.unit_of_work import dispose_engine, init_engine
 from orders.web.api.auth import decode_and_validate_token
 
-app = FastAPI(debug=True, openapi_url="/openapi/orders.json", docs_url="/docs/orders")
+# "sync" serves the API from threadpool handlers, "async" from asyncio
+# handlers on top of SQLAlchemy's asyncio extension.
+API_MODE = os.getenv("ORDERS_API_MODE", "sync")
+
+assert API_MODE in ("sync", "async"), "ORDERS_API_MODE must be sync or async."
+
+OPENAPI_URL = "/openapi/orders.json"
+DOCS_URL = "/docs/orders"
+
+# The OpenAPI document and the docs page are served by orders.web.api.openapi
+# from a pre-rendered copy of oas.yaml, instead of FastAPI's default routes.
+app = FastAPI(debug=True, openapi_url=None, docs_url=None, redoc_url=None)
 
 oas_doc = yaml.safe_load((Path(__file__).parent / "../../oas.yaml").read_text())
 
 app.openapi = lambda: oas_doc
 
 
-class AuthorizeRequestMiddleware(BaseHTTPMiddleware):
-    async def dispatch(
-        self, request: Request, call_next: RequestResponseEndpoint
-    ) -> Response:
-        if os.getenv("AUTH_ON", "False") != "True":
-            request.state.user_id = "test"
-            return await call_next(request)
+@app.on_event("startup")
+def create_db_engine():
+    if API_MODE == "async":
+        init_async_engine()
+    else:
+        init_engine()
+
+
+@app.on_event("shutdown")
+async def release_resources():
+    dispose_engine()
+    await dispose_async_engine()
+    close_client()
+
 
-        if request.url.path in ["/docs/orders", "/openapi/orders.json"]:
-            return await call_next(request)
-        if request.method == "OPTIONS":
-            return await call_next(request)
+class AuthorizeRequestMiddleware:
+    """
+    Pure ASGI middleware that validates the bearer token of every HTTP
+    request and stores the user id in the request state. Unlike
+    `BaseHTTPMiddleware`, it doesn't wrap the downstream app in a separate
+    task, so it adds no per-request overhead and doesn't buffer streaming
+    responses.
+    """
 
-        bearer_token = request.headers.get("Authorization")
+    public_paths = {DOCS_URL, OPENAPI_URL}
+
+    def __init__(self, app: ASGIApp, auth_on: bool = None):
+        self.app = app
+        if auth_on is None:
+            auth_on = os.getenv("AUTH_ON", "False") == "True"
+        self.auth_on = auth_on
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        state = scope.setdefault("state", {})
+        if not self.auth_on:
+            state["user_id"] = "test"
+            await self.app(scope, receive, send)
+            return
+
+        if scope["path"] in self.public_paths or scope["method"] == "OPTIONS":
+            await self.app(scope, receive, send)
+            return
+
+        bearer_token = Headers(scope=scope).get("Authorization")
         if not bearer_token:
-            return JSONResponse(
+            response = JSONResponse(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 content={
                     "detail": "Missing access token",
                     "body": "Missing access token",
                 },
             )
+            await response(scope, receive, send)
+            return
         try:
             auth_token = bearer_token.split(" ")[1].strip()
             token_payload = decode_and_validate_token(auth_token)
@@ -63,13 +116,14 @@ class AuthorizeRequestMiddleware(BaseHTTPMiddleware):
             InvalidTokenError,
             MissingRequiredClaimError,
         ) as error:
-            return JSONResponse(
+            response = JSONResponse(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 content={"detail": str(error), "body": str(error)},
             )
-        else:
-            request.state.user_id = token_payload["sub"]
-        return await call_next(request)
+            await response(scope, receive, send)
+            return
+        state["user_id"] = token_payload["sub"]
+        await self.app(scope, receive, send)
 
 
 app.add_middleware(AuthorizeRequestMiddleware)
@@ -84,4 +138,9 @@ app.add_middleware(
 )
 
 
-from orders.web.api import api
+if API_MODE == "async":
+    from orders.web.api import async_api
+else:
+    from orders.web.api import api
+
+from orders.web.api import metrics, openapi
@@ -0,0 +1,176 @@
+"""
+Delivers the messages in the outbox to the kitchen API. Run it next to the
+API with:
+
+    python -m orders.workers.outbox_dispatcher
+
+Each batch is claimed in a short transaction, and the messages are then
+delivered outside of it, each one marked in its own transaction. Several
+dispatchers can run at the same time, since claimed messages are skipped
+by the other dispatchers until OUTBOX_CLAIM_TIMEOUT seconds have passed.
+
+Run it with the same ORDERS_CACHE_BACKEND and ORDERS_CACHE_URL as the API,
+so that the orders it changes are invalidated in the API's cache. The
+in-process "memory" backend can't be invalidated from here, so it's refused.
+"""
+
+import logging
+import os
+import signal
+import time
+
+from orders.orders_service.exceptions import (
+    APIIntegrationError,
+    DependencyUnavailableError,
+    OrderStatusConflictError,
+)
+from orders.orders_service.orders import Order, OrderItem
+from orders.repository import cache
+from orders.repository.cache import LRUOrderCache
+from orders.repository.orders_repository import OrdersRepository
+from orders.repository.outbox_repository import OutboxRepository
+from orders.repository.unit_of_work import UnitOfWork, dispose_engine
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "50"))
+POLL_INTERVAL = float(os.getenv("OUTBOX_POLL_INTERVAL", "1"))
+MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "10"))
+# Must be longer than a batch takes to deliver, retries included
+CLAIM_TIMEOUT = float(os.getenv("OUTBOX_CLAIM_TIMEOUT", "300"))
+
+
+def schedule_order(message):
+    with UnitOfWork() as unit_of_work:
+        order = OrdersRepository(unit_of_work.session).get(message.order_id)
+    if order is None or order.status != "paid":
+        # The order was deleted or cancelled before it reached the kitchen
+        mark_dispatched(message)
+        return
+    schedule_id = order.schedule(idempotency_key=message.idempotency_key)
+    with UnitOfWork() as unit_of_work:
+        outbox = OutboxRepository(unit_of_work.session)
+        # Only the status is checked: edits made while the kitchen scheduled
+        # the order don't matter, and since the kitchen doesn't deduplicate
+        # schedules, the message must not be retried from here on
+        try:
+            scheduled = OrdersRepository(unit_of_work.session).update(
+                order.id,
+                expected_status="paid",
+                status="progress",
+                schedule_id=schedule_id,
+            )
+        except OrderStatusConflictError:
+            scheduled = None
+        if scheduled is None:
+            # The order was deleted, cancelled or scheduled by another
+            # dispatcher in the meantime, so the new schedule is cancelled
+            outbox.add(
+                order_id=order.id,
+                event_type="cancel_schedule",
+                payload={
+                    "schedule_id": schedule_id,
+                    "order": [item.dict() for item in order.items],
+                },
+            )
+        outbox.mark_dispatched(message.id)
+        unit_of_work.commit()
+
+
+def cancel_schedule(message):
+    items = [OrderItem(None, **item) for item in message.payload["order"]]
+    order = Order(message.order_id, None, items, "cancelled")
+    order.cancel_schedule(message.payload["schedule_id"])
+    mark_dispatched(message)
+
+
+handlers = {
+    "schedule_order": schedule_order,
+    "cancel_schedule": cancel_schedule,
+}
+
+
+def mark_dispatched(message):
+    with UnitOfWork() as unit_of_work:
+        OutboxRepository(unit_of_work.session).mark_dispatched(message.id)
+        unit_of_work.commit()
+
+
+def mark_failed(message, error):
+    with UnitOfWork() as unit_of_work:
+        OutboxRepository(unit_of_work.session).mark_failed(message.id, error)
+        unit_of_work.commit()
+
+
+def claim_batch(batch_size):
+    with UnitOfWork() as unit_of_work:
+        messages = OutboxRepository(unit_of_work.session).claim(
+            batch_size, CLAIM_TIMEOUT, max_attempts=MAX_ATTEMPTS
+        )
+        unit_of_work.commit()
+    return messages
+
+
+def release(messages):
+    with UnitOfWork() as unit_of_work:
+        OutboxRepository(unit_of_work.session).release(
+            [message.id for message in messages]
+        )
+        unit_of_work.commit()
+
+
+def dispatch_batch(batch_size=BATCH_SIZE):
+    """
+    Delivers one batch of pending messages and returns how many were
+    delivered. Failed messages are kept in the outbox and retried in later
+    batches until they reach `MAX_ATTEMPTS`. Every message is marked in its
+    own transaction, so a failure never undoes the record of the messages
+    delivered before it.
+    """
+    dispatched = 0
+    messages = claim_batch(batch_size)
+    for position, message in enumerate(messages):
+        try:
+            handlers[message.event_type](message)
+        except DependencyUnavailableError as error:
+            # The rest of the batch would be rejected too
+            logger.warning("Stopping batch: %s", error)
+            release(messages[position:])
+            break
+        except APIIntegrationError as error:
+            logger.warning("Could not dispatch message %s: %s", message.id, error)
+            mark_failed(message, error)
+        except Exception as error:
+            logger.exception("Could not dispatch message %s", message.id)
+            mark_failed(message, error)
+        else:
+            dispatched += 1
+    return dispatched
+
+
+def run():
+    assert not isinstance(
+        cache.order_cache, LRUOrderCache
+    ), "ORDERS_CACHE_BACKEND=memory can't be invalidated by the outbox dispatcher."
+    running = True
+
+    def stop(signum, frame):
+        nonlocal running
+        running = False
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    while running:
+        try:
+            dispatched = dispatch_batch()
+        except Exception:
+            logger.exception("Outbox dispatch failed")
+            dispatched = 0
+        if dispatched < BATCH_SIZE:
+            time.sleep(POLL_INTERVAL)
+    dispose_engine()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    run()